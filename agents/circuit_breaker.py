@@ -0,0 +1,88 @@
+import os
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Consecutive failures before the breaker opens
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURES", 5))
+# Seconds to stay open before letting one probe request through
+BREAKER_RECOVERY_TIMEOUT = float(os.getenv("LLM_BREAKER_RECOVERY", 30))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Closed: requests flow and failures are counted.
+    Open: requests fail fast until recovery_timeout has passed.
+    Half-open: a single probe is let through; success closes the breaker,
+    failure opens it again.
+    """
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, recovery_timeout=BREAKER_RECOVERY_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self.short_circuited = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a request may be sent now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                logger.info(f"Circuit '{self.name}' half-open: probing endpoint")
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"Circuit '{self.name}' closed: endpoint recovered")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.trips += 1
+                    logger.warning(f"Circuit '{self.name}' open after {self.consecutive_failures} failures")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """A request was abandoned without an outcome; let another probe through."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def is_open(self):
+        """True while requests would be refused (open and not yet due for a probe)."""
+        with self._lock:
+            return self.state == OPEN and time.monotonic() - self.opened_at < self.recovery_timeout
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "trips": self.trips,
+                "short_circuited": self.short_circuited,
+                "consecutive_failures": self.consecutive_failures,
+            }
@@ -1,8 +1,10 @@
-import os
-import time
-import requests
+import asyncio
+import httpx
 from dotenv import load_dotenv
 import logging
+import re
+from agents.llm_cache import classification_cache, cache_key
+from agents.llm_client import get_client, run, LLMError, CircuitOpenError, breaker
 
 load_dotenv()
 
@@ -10,57 +12,58 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Use the working endpoint from debug results
-OLLAMA_API_URL = "https://aditya69690-100-hack.hf.space/api/generate"
+# Generation options for classification (also part of the cache key)
+CLASSIFY_OPTIONS = {
+    "temperature": 0.1,
+    "num_predict": 5,  # Very short response
+    "top_p": 0.9,
+    "stop": ["\n", ".", ",", " "]  # Stop early
+}
 
-def classify_issue(issue_text, model="tinyllama", retries=3):
+VALID_LABELS = {"bug", "feature", "question", "documentation", "discussion"}
+
+def truncate_issue(issue_text):
+    # Truncate issue text aggressively for TinyLLama
+    return issue_text[:300] if len(issue_text) > 300 else issue_text
+
+def build_prompt(issue_text):
+    # Simplified prompt that works better with small models
+    return f"Classify this GitHub issue as one word: bug, feature, question, documentation, or discussion.\n\nIssue: {truncate_issue(issue_text)}\n\nClassification:"
+
+def keyword_fallback(issue_text):
+    """Fallback classification based on keywords"""
+    issue_lower = issue_text.lower()
+    
+    if any(word in issue_lower for word in ["bug", "error", "crash", "broken", "fix", "issue"]):
+        return "bug"
+    elif any(word in issue_lower for word in ["feature", "enhancement", "add", "new", "implement"]):
+        return "feature"
+    elif any(word in issue_lower for word in ["how", "what", "why", "question", "help", "?"]):
+        return "question"
+    elif any(word in issue_lower for word in ["docs", "documentation", "readme", "guide", "tutorial"]):
+        return "documentation"
+    else:
+        return "discussion"
+
+async def classify_issue_async(issue_text, model="tinyllama", retries=3, with_source=False):
     """
     Classify GitHub issues using TinyLLama hosted on HuggingFace
     Returns one of: bug, feature, question, documentation, discussion, unknown
+    With with_source=True returns (label, source) instead, source being "llm",
+    "cache" or "keyword_fallback" (every LLM attempt failed).
     """
+    def labeled(label, source):
+        return (label, source) if with_source else label
     
     # Very short and focused prompt for TinyLLama
-    # Truncate issue text more aggressively
-    truncated_text = issue_text[:300] if len(issue_text) > 300 else issue_text
-    
-    # Simplified prompt that works better with small models
-    prompt = f"Classify this GitHub issue as one word: bug, feature, question, documentation, or discussion.\n\nIssue: {truncated_text}\n\nClassification:"
+    prompt = build_prompt(issue_text)
 
-    def call_llm(prompt_text, attempt):
+    async def call_llm(prompt_text, attempt):
         try:
             logger.info(f"Attempt {attempt}: Calling LLM API...")
             
-            # Use the /api/generate format that works
-            payload = {
-                "model": model,
-                "prompt": prompt_text,
-                "stream": False,
-                "options": {
-                    "temperature": 0.1,
-                    "num_predict": 5,  # Very short response
-                    "top_p": 0.9,
-                    "stop": ["\n", ".", ",", " "]  # Stop early
-                }
-            }
-            
-            response = requests.post(
-                OLLAMA_API_URL,
-                json=payload,
-                timeout=45,  # Increased timeout for CPU inference
-                headers={"Content-Type": "application/json"}
-            )
-            
-            logger.info(f"Response status: {response.status_code}")
-            
-            if response.status_code != 200:
-                logger.error(f"HTTP Error {response.status_code}: {response.text}")
-                return "unknown"
-            
-            response_data = response.json()
-            logger.info(f"Full response: {response_data}")
-            
             # Extract content from /api/generate response format
-            content = response_data.get("response", "").strip()
+            content = (await get_client().generate(prompt_text, model, CLASSIFY_OPTIONS)).strip()
             
             if not content:
                 logger.error("Empty content in response")
@@ -77,7 +80,7 @@ def classify_issue(issue_text, model="tinyllama", retries=3):
             first_word = first_word.replace(":", "").replace("-", "").replace("*", "")
             
             # Check if it's a valid classification
-            valid_labels = {"bug", "feature", "question", "documentation", "discussion"}
+            valid_labels = VALID_LABELS
             if first_word in valid_labels:
                 logger.info(f"Successfully classified as: {first_word}")
                 return first_word
@@ -91,42 +94,143 @@ def classify_issue(issue_text, model="tinyllama", retries=3):
             logger.warning(f"No valid label found in: '{cleaned}'")
             return "unknown"
             
-        except requests.exceptions.Timeout:
+        except CircuitOpenError:
+            logger.warning("LLM circuit open, skipping straight to fallback")
+            return "unknown"
+        except httpx.TimeoutException:
             logger.error(f"Timeout on attempt {attempt}")
             return "unknown"
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, LLMError) as e:
             logger.error(f"Request error on attempt {attempt}: {e}")
             return "unknown"
         except Exception as e:
             logger.error(f"Unexpected error on attempt {attempt}: {e}")
             return "unknown"
 
+    # Identical prompts (re-runs, forks, mirrors) are served from the disk cache
+    key = cache_key(prompt, model, CLASSIFY_OPTIONS)
+    cached = classification_cache.get(key)
+    if cached:
+        logger.info(f"Cache hit: {cached}")
+        return labeled(cached, "cache")
+
     # Retry logic with exponential backoff
     for attempt in range(1, retries + 1):
-        result = call_llm(prompt, attempt)
+        result = await call_llm(prompt, attempt)
         
         if result != "unknown":
-            return result
+            classification_cache.set(key, result)
+            return labeled(result, "llm")
+        
+        # Endpoint known to be down: no point sleeping before another attempt
+        if breaker.is_open():
+            break
         
         if attempt < retries:
             wait_time = 2 ** attempt  # Exponential backoff: 2, 4, 8 seconds
             logger.info(f"Retrying in {wait_time} seconds...")
-            time.sleep(wait_time)
+            await asyncio.sleep(wait_time)
 
-    # Fallback classification based on keywords
     logger.info("Using keyword-based fallback classification")
-    issue_lower = issue_text.lower()
-    
-    if any(word in issue_lower for word in ["bug", "error", "crash", "broken", "fix", "issue"]):
-        return "bug"
-    elif any(word in issue_lower for word in ["feature", "enhancement", "add", "new", "implement"]):
-        return "feature"
-    elif any(word in issue_lower for word in ["how", "what", "why", "question", "help", "?"]):
-        return "question"
-    elif any(word in issue_lower for word in ["docs", "documentation", "readme", "guide", "tutorial"]):
-        return "documentation"
-    else:
-        return "discussion"
+    return labeled(keyword_fallback(issue_text), "keyword_fallback")
+
+def classify_issue(issue_text, model="tinyllama", retries=3):
+    """Blocking wrapper around classify_issue_async for synchronous callers."""
+    return run(classify_issue_async(issue_text, model, retries))
+
+# Batch classification: one numbered prompt for many issues
+BATCH_LINE = re.compile(r"^\s*(\d+)\s*[:.)\-]\s*\**\s*([a-zA-Z]+)")
+
+def build_batch_prompt(issue_texts):
+    numbered = "\n".join(
+        f"{n}. {' '.join(truncate_issue(text).split())}" for n, text in enumerate(issue_texts, 1)
+    )
+    return (
+        "Classify each GitHub issue below as one word: bug, feature, question, documentation, or discussion.\n"
+        "Answer with one line per issue in the form '<number>: <label>'.\n\n"
+        f"{numbered}\n\nClassifications:\n"
+    )
+
+def parse_batch_labels(content, count):
+    """Map the numbered answer lines back to labels; None where a line is missing or invalid."""
+    labels = [None] * count
+    for line in content.splitlines():
+        match = BATCH_LINE.match(line)
+        if not match:
+            continue
+        index = int(match.group(1)) - 1
+        label = match.group(2).lower()
+        if 0 <= index < count and labels[index] is None and label in VALID_LABELS:
+            labels[index] = label
+    return labels
+
+async def call_batch_llm(issue_texts, model, attempt):
+    try:
+        logger.info(f"Batch attempt {attempt}: classifying {len(issue_texts)} issues in one call...")
+        options = {
+            "temperature": 0.1,
+            "num_predict": 8 * len(issue_texts),  # "<n>: <label>" per line
+            "top_p": 0.9,
+            "stop": ["\n\n"]
+        }
+        content = await get_client().generate(
+            build_batch_prompt(issue_texts), model, options,
+            timeout=45 + 5 * len(issue_texts)
+        )
+        logger.info(f"Batch LLM returned: '{content.strip()}'")
+        return parse_batch_labels(content, len(issue_texts))
+
+    except (httpx.HTTPError, LLMError) as e:
+        logger.error(f"Batch request error on attempt {attempt}: {e}")
+    except Exception as e:
+        logger.error(f"Batch unexpected error on attempt {attempt}: {e}")
+    return [None] * len(issue_texts)
+
+async def classify_issues_batch_async(issue_texts, model="tinyllama", retries=2, with_source=False):
+    """
+    Classify several issues with a single LLM call.
+    Cached issues are answered locally; entries the model did not answer with a
+    valid label are retried in a smaller batch, then classified one by one.
+    Returns labels in the same order as issue_texts, or (label, source) pairs
+    with with_source=True (see classify_issue_async).
+    """
+    results = [None] * len(issue_texts)
+    # Same keys as classify_issue, so single and batch results share the cache
+    keys = [cache_key(build_prompt(text), model, CLASSIFY_OPTIONS) for text in issue_texts]
+
+    pending = []
+    for i, key in enumerate(keys):
+        cached = classification_cache.get(key)
+        if cached:
+            results[i] = (cached, "cache")
+        else:
+            pending.append(i)
+
+    for attempt in range(1, retries + 1):
+        if not pending:
+            break
+        labels = await call_batch_llm([issue_texts[i] for i in pending], model, attempt)
+        failed = []
+        for i, label in zip(pending, labels):
+            if label:
+                results[i] = (label, "llm")
+                classification_cache.set(keys[i], label)
+            else:
+                failed.append(i)
+        if failed:
+            logger.warning(f"Batch attempt {attempt}: {len(failed)} of {len(pending)} entries unparsed")
+        pending = failed
+        if breaker.is_open():
+            break
+
+    for i in pending:
+        results[i] = await classify_issue_async(issue_texts[i], model=model, retries=1, with_source=True)
+
+    return results if with_source else [label for label, _ in results]
+
+def classify_issues_batch(issue_texts, model="tinyllama", retries=2):
+    """Blocking wrapper around classify_issues_batch_async."""
+    return run(classify_issues_batch_async(issue_texts, model, retries))
 
 # Test function to verify the API is working
 def test_classifier():
@@ -0,0 +1,93 @@
+import re
+import httpx
+import logging
+from agents.llm_client import get_client, run, LLMError, CircuitOpenError
+from agents.classifier_agent import VALID_LABELS, truncate_issue, classify_issue_async
+from agents.devrel_agent import validate_suggestion, fallback_suggestion
+
+logger = logging.getLogger(__name__)
+
+# One generation covers the label and the suggestion
+COMBINED_OPTIONS = {
+    "temperature": 0.3,
+    "num_predict": 160,  # a label line plus up to ~120 words
+    "top_p": 0.85,
+    "stop": ["\n\n\n"]
+}
+
+LABEL_LINE = re.compile(r"label\s*:\s*\**\s*([a-zA-Z]+)", re.IGNORECASE)
+ACTION_LINE = re.compile(r"action\s*:\s*(.+)", re.IGNORECASE | re.DOTALL)
+
+
+def build_combined_prompt(issue):
+    title = issue.get("title", "")[:150]
+    body = truncate_issue(issue.get("body", ""))
+    return f"""You are a Developer Relations expert. Read this GitHub issue, classify it, and suggest ONE specific, actionable DevRel strategy.
+
+Title: {title}
+Description: {body}
+
+Answer in exactly this format:
+Label: <one word: bug, feature, question, documentation, or discussion>
+Action: <what content to create, for which audience, and the expected outcome, under 120 words>
+
+Label:"""
+
+
+def parse_combined(content):
+    """Split the answer into (label, action); either is None if malformed."""
+    # The prompt ends with "Label:", so the answer usually starts with the label itself
+    text = content if LABEL_LINE.search(content) else f"Label: {content}"
+
+    label = None
+    match = LABEL_LINE.search(text)
+    if match and match.group(1).lower() in VALID_LABELS:
+        label = match.group(1).lower()
+
+    action = None
+    match = ACTION_LINE.search(text)
+    if match:
+        action = validate_suggestion(match.group(1)) or None
+
+    return label, action
+
+
+async def classify_and_recommend_async(issue, model="tinyllama"):
+    """
+    Classify an issue and suggest a DevRel action with a single LLM call.
+    Returns the issue fields {"predicted_label", "label_source", "devrel_action",
+    "devrel_source"}.
+    A malformed label falls back to classify_issue_async (whose source is kept),
+    a malformed action to the DevRel agent's template suggestions.
+    """
+    label, action, source = None, None, "llm"
+    try:
+        logger.info(f"Combined call for issue #{issue.get('number')}...")
+        content = await get_client().generate(build_combined_prompt(issue), model, COMBINED_OPTIONS)
+        logger.info(f"Combined LLM returned: '{content.strip()}'")
+        label, action = parse_combined(content)
+    except CircuitOpenError:
+        logger.warning("Combined LLM circuit open, using fallbacks")
+    except httpx.TimeoutException:
+        logger.error(f"Combined call timed out for issue #{issue.get('number')}")
+    except (httpx.HTTPError, LLMError) as e:
+        logger.error(f"Combined request error for issue #{issue.get('number')}: {e}")
+    except Exception as e:
+        logger.error(f"Combined unexpected error for issue #{issue.get('number')}: {e}")
+
+    if label is None:
+        logger.warning(f"Combined label unusable for issue #{issue.get('number')}, classifying separately")
+        text = f"{issue.get('title', '')}\n\n{issue.get('body', '')}"
+        label, source = await classify_issue_async(text, model=model, retries=1, with_source=True)
+
+    devrel_source = "llm"
+    if action is None:
+        action = fallback_suggestion(issue, label)
+        devrel_source = "fallback"
+
+    return {"predicted_label": label, "label_source": source, "devrel_action": action, "devrel_source": devrel_source}
+
+
+def classify_and_recommend(issue, model="tinyllama"):
+    """Blocking wrapper around classify_and_recommend_async."""
+    return run(classify_and_recommend_async(issue, model))
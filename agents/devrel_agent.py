@@ -1,136 +1,44 @@
 import os
-import time
-import requests
+import re
+import httpx
 from dotenv import load_dotenv
 import logging
+from agents.llm_client import get_client, run, LLMError, CircuitOpenError, StreamStats
 
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Use the working endpoint from debug results
-OLLAMA_API_URL = "https://aditya69690-100-hack.hf.space/api/generate"
+# Generation options for DevRel suggestions
+DEVREL_OPTIONS = {
+    "temperature": 0.4,  # Slightly higher for more creative responses
+    "num_predict": 150,  # Allow up to 120+ words
+    "top_p": 0.85,
+    "stop": ["\n\nDevRel Action:", "Action:", "\n\n\n"]  # Better stop tokens
+}
 
-def recommend_devrel_action(issue, model="tinyllama", min_word_count=8):
-    """
-    Generate DevRel suggestions for GitHub issues using TinyLLama
-    """
-    
-    title = issue.get("title", "")[:150]  # Slightly longer for context
-    body = issue.get("body", "")[:300]    # More context for better suggestions
-    label = issue.get("predicted_label", "unknown")
-    
-    # More detailed prompt for concrete, actionable suggestions
-    prompt = f"""You are a Developer Relations expert. Analyze this GitHub issue and provide ONE specific, actionable DevRel strategy.
-
-Issue Type: {label}
-Title: {title}
-Description: {body}
+# Stream suggestions so rejected answers can be cut off mid-generation
+DEVREL_STREAM = os.getenv("DEVREL_STREAM", "true").lower() in ("1", "true", "yes")
+# Matches "Keep response under 120 words" in the prompt
+DEVREL_WORD_BUDGET = int(os.getenv("DEVREL_WORD_BUDGET", 120))
 
-Provide a concrete suggestion that includes:
-- What specific content to create (blog post, tutorial, documentation, etc.)
-- Target audience and key points to address
-- Expected outcome for the community
+# Responses containing any of these are discarded
+UNHELPFUL_PHRASES = [
+    "no suggestion", 
+    "not applicable", 
+    "unclear",
+    "i don't know",
+    "cannot determine",
+    "sorry"
+]
 
-Keep response under 120 words but complete the thought.
+SENTENCE_END = re.compile(r"[.!?](?=\s|$)")
 
-DevRel Action:"""
+stream_stats = StreamStats()
 
-    def call_llm(prompt_text, attempt):
-        try:
-            logger.info(f"DevRel attempt {attempt}: Calling LLM API...")
-            
-            # Use the /api/generate format that works
-            payload = {
-                "model": model,
-                "prompt": prompt_text,
-                "stream": False,
-                "options": {
-                    "temperature": 0.4,  # Slightly higher for more creative responses
-                    "num_predict": 150,  # Allow up to 120+ words
-                    "top_p": 0.85,
-                    "stop": ["\n\nDevRel Action:", "Action:", "\n\n\n"]  # Better stop tokens
-                }
-            }
-            
-            response = requests.post(
-                OLLAMA_API_URL,
-                json=payload,
-                timeout=45,  # Longer timeout for generation
-                headers={"Content-Type": "application/json"}
-            )
-            
-            logger.info(f"DevRel response status: {response.status_code}")
-            
-            if response.status_code != 200:
-                logger.error(f"DevRel HTTP Error {response.status_code}: {response.text}")
-                return ""
-            
-            response_data = response.json()
-            logger.info(f"DevRel full response: {response_data}")
-            
-            # Extract content from /api/generate response format
-            content = response_data.get("response", "").strip()
-            
-            if not content:
-                logger.error("DevRel empty content in response")
-                return ""
-            
-            # Clean the response
-            cleaned = content.strip()
-            logger.info(f"DevRel LLM returned: '{cleaned}'")
-            
-            # Basic quality checks - more flexible length
-            if len(cleaned) < 20:  # Minimum for meaningful suggestion
-                logger.warning(f"DevRel response too short: '{cleaned}'")
-                return ""
-            
-            # Check word count - flexible around 120 words
-            word_count = len(cleaned.split())
-            if word_count < 10:  # Too short to be useful
-                logger.warning(f"DevRel response too brief ({word_count} words): '{cleaned}'")
-                return ""
-            
-            # Remove common unhelpful responses
-            unhelpful_phrases = [
-                "no suggestion", 
-                "not applicable", 
-                "unclear",
-                "i don't know",
-                "cannot determine",
-                "sorry"
-            ]
-            
-            if any(phrase in cleaned.lower() for phrase in unhelpful_phrases):
-                logger.warning(f"DevRel unhelpful response: '{cleaned}'")
-                return ""
-            
-            # Check minimum word count for substance
-            if len(cleaned.split()) < 8:  # Reduced minimum for flexibility
-                logger.warning(f"DevRel response below minimum word count: '{cleaned}'")
-                return ""
-            
-            logger.info(f"DevRel successful suggestion: '{cleaned}'")
-            return cleaned
-            
-        except requests.exceptions.Timeout:
-            logger.error(f"DevRel timeout on attempt {attempt}")
-            return ""
-        except requests.exceptions.RequestException as e:
-            logger.error(f"DevRel request error on attempt {attempt}: {e}")
-            return ""
-        except Exception as e:
-            logger.error(f"DevRel unexpected error on attempt {attempt}: {e}")
-            return ""
-
-    # Try LLM first (single attempt due to reliability issues)
-    result = call_llm(prompt, 1)
-    
-    if result:  # If we got a valid response
-        return result
-
-    # Enhanced fallback suggestions - more concrete and detailed
+def fallback_suggestion(issue, label):
+    """Enhanced fallback suggestions - more concrete and detailed"""
     logger.info(f"DevRel using enhanced fallback suggestion for {label}")
     
     title_lower = issue.get("title", "").lower()
@@ -177,6 +85,143 @@ DevRel Action:"""
     else:  # discussion or unknown
         return "Facilitate structured community discussions with dedicated forums, regular AMAs, and feedback collection mechanisms. Create discussion templates and moderation guidelines. Target active community members and potential contributors. Expected outcome: Stronger community engagement and valuable product insights for roadmap planning."
 
+def validate_suggestion(content):
+    """Apply the quality checks to raw LLM output; returns the suggestion or "" if rejected."""
+    content = content.strip()
+    
+    if not content:
+        logger.error("DevRel empty content in response")
+        return ""
+    
+    # Clean the response
+    cleaned = content.strip()
+    logger.info(f"DevRel LLM returned: '{cleaned}'")
+    
+    # Basic quality checks - more flexible length
+    if len(cleaned) < 20:  # Minimum for meaningful suggestion
+        logger.warning(f"DevRel response too short: '{cleaned}'")
+        return ""
+    
+    # Check word count - flexible around 120 words
+    word_count = len(cleaned.split())
+    if word_count < 10:  # Too short to be useful
+        logger.warning(f"DevRel response too brief ({word_count} words): '{cleaned}'")
+        return ""
+    
+    # Remove common unhelpful responses
+    if any(phrase in cleaned.lower() for phrase in UNHELPFUL_PHRASES):
+        logger.warning(f"DevRel unhelpful response: '{cleaned}'")
+        return ""
+    
+    # Check minimum word count for substance
+    if len(cleaned.split()) < 8:  # Reduced minimum for flexibility
+        logger.warning(f"DevRel response below minimum word count: '{cleaned}'")
+        return ""
+    
+    logger.info(f"DevRel successful suggestion: '{cleaned}'")
+    return cleaned
+
+async def stream_suggestion(prompt, model, word_budget=DEVREL_WORD_BUDGET):
+    """
+    Read the generation as it streams in. Returns None as soon as a rejection
+    phrase appears, and stops at the last full sentence once word_budget is reached.
+    """
+    started = stream_stats.start()
+    text = ""
+    tokens = get_client().stream(prompt, model, DEVREL_OPTIONS)
+    try:
+        async for token in tokens:
+            if not text:
+                stream_stats.first_token(started)
+            text += token
+
+            if any(phrase in text.lower() for phrase in UNHELPFUL_PHRASES):
+                stream_stats.outcome("aborted_rejection")
+                logger.warning(f"DevRel aborting unhelpful stream: '{text.strip()}'")
+                return None
+
+            if len(text.split()) >= word_budget:
+                ends = [m.end() for m in SENTENCE_END.finditer(text)]
+                if ends:
+                    text = text[:ends[-1]]
+                stream_stats.outcome("stopped_at_budget")
+                logger.info(f"DevRel stream stopped at the {word_budget}-word budget")
+                return text
+
+        stream_stats.outcome("completed")
+        return text
+    finally:
+        # Closing the stream drops the connection and ends the generation
+        await tokens.aclose()
+
+async def recommend_devrel_action_async(issue, model="tinyllama", min_word_count=8, with_source=False):
+    """
+    Generate DevRel suggestions for GitHub issues using TinyLLama
+    With with_source=True returns (suggestion, source), source being "llm" or
+    "fallback" (the LLM failed and a template was used).
+    """
+    
+    title = issue.get("title", "")[:150]  # Slightly longer for context
+    body = issue.get("body", "")[:300]    # More context for better suggestions
+    label = issue.get("predicted_label", "unknown")
+    
+    # More detailed prompt for concrete, actionable suggestions
+    prompt = f"""You are a Developer Relations expert. Analyze this GitHub issue and provide ONE specific, actionable DevRel strategy.
+
+Issue Type: {label}
+Title: {title}
+Description: {body}
+
+Provide a concrete suggestion that includes:
+- What specific content to create (blog post, tutorial, documentation, etc.)
+- Target audience and key points to address
+- Expected outcome for the community
+
+Keep response under 120 words but complete the thought.
+
+DevRel Action:"""
+
+    async def call_llm(prompt_text, attempt):
+        try:
+            logger.info(f"DevRel attempt {attempt}: Calling LLM API...")
+            
+            if DEVREL_STREAM:
+                content = await stream_suggestion(prompt_text, model)
+                if content is None:
+                    return ""
+            else:
+                # Extract content from /api/generate response format
+                content = await get_client().generate(prompt_text, model, DEVREL_OPTIONS)
+            content = content.strip()
+            
+            return validate_suggestion(content)
+            
+        except CircuitOpenError:
+            logger.warning("DevRel LLM circuit open, using fallback suggestion")
+            return ""
+        except httpx.TimeoutException:
+            logger.error(f"DevRel timeout on attempt {attempt}")
+            return ""
+        except (httpx.HTTPError, LLMError) as e:
+            logger.error(f"DevRel request error on attempt {attempt}: {e}")
+            return ""
+        except Exception as e:
+            logger.error(f"DevRel unexpected error on attempt {attempt}: {e}")
+            return ""
+
+    # Try LLM first (single attempt due to reliability issues)
+    result = await call_llm(prompt, 1)
+    
+    if result:  # If we got a valid response
+        return (result, "llm") if with_source else result
+
+    suggestion = fallback_suggestion(issue, label)
+    return (suggestion, "fallback") if with_source else suggestion
+
+def recommend_devrel_action(issue, model="tinyllama", min_word_count=8):
+    """Blocking wrapper around recommend_devrel_action_async for synchronous callers."""
+    return run(recommend_devrel_action_async(issue, model, min_word_count))
+
 # Test function
 def test_devrel():
     """Test function to verify the DevRel agent is working"""
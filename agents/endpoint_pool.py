@@ -0,0 +1,184 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import httpx
+from agents.llm_backends import make_backend, LLMError
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated replica URLs; when set, requests are spread across all of them
+LLM_ENDPOINTS = [url.strip() for url in os.getenv("LLM_ENDPOINTS", "").split(",") if url.strip()]
+# Seconds between health checks of every replica
+HEALTH_CHECK_INTERVAL = float(os.getenv("LLM_HEALTH_INTERVAL", 15))
+# Consecutive request failures before a replica is ejected until it passes a health check
+EJECT_AFTER_FAILURES = int(os.getenv("LLM_EJECT_FAILURES", 3))
+# Weight of the newest latency sample in the moving average
+EWMA_ALPHA = 0.3
+
+# Constructor argument that carries the URL for each backend kind
+URL_OPTION = {"ollama_http": "url", "openai": "base_url"}
+
+
+class Endpoint:
+    """One replica: its backend plus the load and health numbers used for routing."""
+
+    def __init__(self, url, backend):
+        self.url = url
+        self.backend = backend
+        self.in_flight = 0
+        self.latency = None  # EWMA in seconds
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.failures = 0
+        self.ejections = 0
+
+    def score(self):
+        # Expected wait if routed here: typical latency times the queue it joins
+        return (self.latency or 1.0) * (self.in_flight + 1)
+
+    def observe(self, seconds):
+        self.latency = seconds if self.latency is None else EWMA_ALPHA * seconds + (1 - EWMA_ALPHA) * self.latency
+
+    def succeeded(self, seconds):
+        self.observe(seconds)
+        self.consecutive_failures = 0
+
+    def failed(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.healthy and self.consecutive_failures >= EJECT_AFTER_FAILURES:
+            self.eject(f"{self.consecutive_failures} consecutive failures")
+
+    def eject(self, reason):
+        if self.healthy:
+            self.ejections += 1
+            logger.warning(f"Ejecting LLM endpoint {self.url}: {reason}")
+        self.healthy = False
+
+    def stats(self):
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "latency_ewma_ms": round(self.latency * 1000) if self.latency is not None else None,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejections": self.ejections,
+        }
+
+
+class EndpointPool:
+    """
+    Spreads requests over several replicas of the same backend kind, behaving
+    like a single backend to AsyncLLMClient. Each request goes to the healthy
+    replica with the lowest latency EWMA x (in-flight + 1); a failed generate is
+    retried once on another replica. Replicas are ejected after repeated
+    failures or a failed health check, and re-admitted when a check passes.
+    If every replica is ejected, all of them are tried rather than none.
+    """
+
+    name = "pool"
+
+    def __init__(self, kind, urls, connections=4, health_interval=HEALTH_CHECK_INTERVAL):
+        if kind not in URL_OPTION:
+            raise ValueError(f"LLM_ENDPOINTS needs an HTTP backend ({', '.join(URL_OPTION)}), not '{kind}'")
+        self.endpoints = [
+            Endpoint(url, make_backend(kind, connections=connections, **{URL_OPTION[kind]: url}))
+            for url in urls
+        ]
+        self.health_interval = health_interval
+        self._health_client = httpx.AsyncClient()
+        self._health_task = None
+
+    def pick(self, exclude=()):
+        candidates = [e for e in self.endpoints if e.healthy and e not in exclude]
+        if not candidates:
+            candidates = [e for e in self.endpoints if e not in exclude] or self.endpoints
+        best = min(e.score() for e in candidates)
+        return random.choice([e for e in candidates if e.score() == best])
+
+    def start_health_checks(self):
+        # Started lazily so the task lands on the loop that serves the requests
+        if self._health_task is None:
+            self._health_task = asyncio.get_running_loop().create_task(self.health_loop())
+
+    async def health_loop(self):
+        while True:
+            await asyncio.gather(*(self.check(endpoint) for endpoint in self.endpoints))
+            await asyncio.sleep(self.health_interval)
+
+    async def check(self, endpoint):
+        url = endpoint.backend.health_url
+        started = time.monotonic()
+        try:
+            response = await self._health_client.get(url, timeout=10)
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            if not endpoint.healthy:
+                logger.info(f"LLM endpoint {endpoint.url} passed its health check, re-admitting")
+            endpoint.healthy = True
+            endpoint.consecutive_failures = 0
+            # A health probe is much cheaper than a generation; only seed the average with it
+            if endpoint.latency is None:
+                endpoint.observe(time.monotonic() - started)
+        else:
+            endpoint.eject(f"health check on {url} failed")
+
+    async def generate(self, prompt, model, options, timeout):
+        self.start_health_checks()
+        tried = []
+        while True:
+            endpoint = self.pick(exclude=tried)
+            tried.append(endpoint)
+            endpoint.in_flight += 1
+            endpoint.requests += 1
+            started = time.monotonic()
+            try:
+                content = await endpoint.backend.generate(prompt, model, options, timeout)
+            except (httpx.HTTPError, LLMError) as e:
+                endpoint.failed()
+                if len(tried) >= min(2, len(self.endpoints)):
+                    raise
+                logger.warning(f"LLM endpoint {endpoint.url} failed ({e}), retrying on another replica")
+                continue
+            finally:
+                endpoint.in_flight -= 1
+            endpoint.succeeded(time.monotonic() - started)
+            return content
+
+    async def stream(self, prompt, model, options, timeout):
+        self.start_health_checks()
+        endpoint = self.pick()
+        endpoint.in_flight += 1
+        endpoint.requests += 1
+        started = time.monotonic()
+        fragments = endpoint.backend.stream(prompt, model, options, timeout)
+        first = True
+        try:
+            async for fragment in fragments:
+                if first:
+                    # Time to first token is what routing cares about for streams
+                    endpoint.succeeded(time.monotonic() - started)
+                    first = False
+                yield fragment
+        except (httpx.HTTPError, LLMError):
+            endpoint.failed()
+            raise
+        finally:
+            endpoint.in_flight -= 1
+            await fragments.aclose()
+
+    def stats(self):
+        return [endpoint.stats() for endpoint in self.endpoints]
+
+    async def aclose(self):
+        if self._health_task:
+            self._health_task.cancel()
+        await self._health_client.aclose()
+        for endpoint in self.endpoints:
+            await endpoint.backend.aclose()
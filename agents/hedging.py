@@ -0,0 +1,66 @@
+import os
+import threading
+from collections import deque, defaultdict
+
+# Hedging is opt-in: it trades extra endpoint load for a shorter latency tail
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() in ("1", "true", "yes")
+# Send the duplicate once a request is slower than this percentile of recent calls
+HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", 95))
+# At most this fraction of requests may be hedged
+HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", 0.05))
+# Recent latencies kept per request kind, and how many are needed before hedging
+HEDGE_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+
+
+class HedgePolicy:
+    """
+    Decides when a slow LLM request gets a duplicate. Latencies are tracked per
+    request kind (prompts with different num_predict take very different times),
+    and hedges are only granted while they stay under budget x requests.
+    """
+
+    def __init__(self, percentile=HEDGE_PERCENTILE, budget=HEDGE_BUDGET,
+                 window=HEDGE_WINDOW, min_samples=HEDGE_MIN_SAMPLES):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self._latencies = defaultdict(lambda: deque(maxlen=window))
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+
+    def observe(self, kind, seconds):
+        with self._lock:
+            self._latencies[kind].append(seconds)
+
+    def delay(self, kind):
+        """Seconds to wait before hedging a request of this kind; None while there is too little data."""
+        with self._lock:
+            self.requests += 1
+            samples = sorted(self._latencies[kind])
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * self.percentile / 100))]
+
+    def allow(self):
+        """Take one hedge from the budget if any is left."""
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def won(self):
+        with self._lock:
+            self.hedge_wins += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "hedge_rate": round(self.hedges / self.requests * 100, 1) if self.requests else 0.0,
+            }
@@ -0,0 +1,224 @@
+"""
+Interchangeable LLM backends. Each one exposes the same three coroutines:
+
+    generate(prompt, model, options, timeout) -> str
+    stream(prompt, model, options, timeout)   -> async iterator of text fragments
+    aclose()
+
+Options use Ollama's names (temperature, top_p, num_predict, stop) and are
+translated where a backend calls them something else. Transport failures raise
+httpx.HTTPError, bad answers raise LLMError, so the client's circuit breaker
+treats every backend alike.
+"""
+import os
+import json
+import asyncio
+from urllib.parse import urlsplit
+import httpx
+from dotenv import load_dotenv
+from agents.mock_llm_server import mock_response
+
+load_dotenv()
+
+# Which backend the shared client uses: ollama_http, ollama_local, openai or mock
+LLM_BACKEND = os.getenv("LLM_BACKEND", "ollama_http")
+# Use the working endpoint from debug results
+OLLAMA_API_URL = os.getenv("OLLAMA_API_URL", "https://aditya69690-100-hack.hf.space/api/generate")
+# Local Ollama daemon for the ollama_local backend, and how long it keeps the model loaded
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Any server speaking the OpenAI chat completions API (vLLM, llama.cpp, LM Studio, ...)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "http://localhost:8000/v1")
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+
+
+class LLMError(Exception):
+    """The endpoint answered with a non-200 status or an unusable body."""
+
+
+class OllamaHTTPBackend:
+    """Ollama's /api/generate over HTTP (the Hugging Face Space or any ollama serve)."""
+
+    name = "ollama_http"
+
+    def __init__(self, url=OLLAMA_API_URL, connections=4):
+        self.url = url
+        # Lists the loaded models; cheap enough to poll for health
+        parts = urlsplit(url)
+        self.health_url = f"{parts.scheme}://{parts.netloc}/api/tags"
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+            headers={"Content-Type": "application/json"}
+        )
+
+    async def generate(self, prompt, model, options, timeout):
+        payload = {"model": model, "prompt": prompt, "stream": False, "options": options}
+        response = await self._client.post(self.url, json=payload, timeout=timeout)
+        if response.status_code != 200:
+            raise LLMError(f"HTTP Error {response.status_code}: {response.text}")
+        try:
+            return response.json().get("response", "")
+        except (ValueError, AttributeError) as e:
+            raise LLMError(f"Unexpected generate body: {e}")
+
+    async def stream(self, prompt, model, options, timeout):
+        payload = {"model": model, "prompt": prompt, "stream": True, "options": options}
+        async with self._client.stream("POST", self.url, json=payload, timeout=timeout) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise LLMError(f"HTTP Error {response.status_code}: {response.text}")
+            # Ollama streams one JSON object per line
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                try:
+                    chunk = json.loads(line)
+                except ValueError as e:
+                    raise LLMError(f"Unexpected stream line: {e}")
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+class LocalOllamaBackend:
+    """
+    A local Ollama daemon through the ollama Python client. keep_alive keeps the
+    model loaded between calls, so only the first request pays the load time.
+    """
+
+    name = "ollama_local"
+
+    def __init__(self, host=OLLAMA_HOST, keep_alive=OLLAMA_KEEP_ALIVE):
+        import ollama  # only needed for this backend
+        self._ollama = ollama
+        self._client = ollama.AsyncClient(host=host)
+        self.keep_alive = keep_alive
+
+    async def generate(self, prompt, model, options, timeout):
+        try:
+            response = await asyncio.wait_for(
+                self._client.generate(model=model, prompt=prompt, options=options, keep_alive=self.keep_alive),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            raise httpx.ReadTimeout(f"ollama generate exceeded {timeout}s")
+        except (self._ollama.ResponseError, ConnectionError) as e:
+            raise LLMError(str(e))
+        try:
+            return response["response"]
+        except (KeyError, TypeError) as e:
+            raise LLMError(f"Unexpected generate body: {e}")
+
+    async def stream(self, prompt, model, options, timeout):
+        try:
+            parts = await self._client.generate(
+                model=model, prompt=prompt, options=options, keep_alive=self.keep_alive, stream=True
+            )
+            async for part in parts:
+                if part["response"]:
+                    yield part["response"]
+        except (self._ollama.ResponseError, ConnectionError) as e:
+            raise LLMError(str(e))
+
+    async def aclose(self):
+        pass
+
+
+class OpenAIBackend:
+    """OpenAI-compatible /chat/completions; the prompt is sent as a single user message."""
+
+    name = "openai"
+
+    def __init__(self, base_url=OPENAI_BASE_URL, api_key=OPENAI_API_KEY, connections=4):
+        self.url = f"{base_url.rstrip('/')}/chat/completions"
+        self.health_url = f"{base_url.rstrip('/')}/models"
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+            headers=headers
+        )
+
+    def payload(self, prompt, model, options, stream):
+        payload = {"model": model, "messages": [{"role": "user", "content": prompt}], "stream": stream}
+        for ours, theirs in (("temperature", "temperature"), ("top_p", "top_p"),
+                             ("num_predict", "max_tokens"), ("stop", "stop")):
+            if ours in options:
+                payload[theirs] = options[ours]
+        # The API accepts at most four stop sequences
+        if "stop" in payload:
+            payload["stop"] = payload["stop"][:4]
+        return payload
+
+    async def generate(self, prompt, model, options, timeout):
+        response = await self._client.post(self.url, json=self.payload(prompt, model, options, False), timeout=timeout)
+        if response.status_code != 200:
+            raise LLMError(f"HTTP Error {response.status_code}: {response.text}")
+        try:
+            return response.json()["choices"][0]["message"]["content"] or ""
+        except (KeyError, IndexError, ValueError) as e:
+            raise LLMError(f"Unexpected completion body: {e}")
+
+    async def stream(self, prompt, model, options, timeout):
+        payload = self.payload(prompt, model, options, True)
+        async with self._client.stream("POST", self.url, json=payload, timeout=timeout) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise LLMError(f"HTTP Error {response.status_code}: {response.text}")
+            # Server-sent events: "data: {...}" lines, terminated by "data: [DONE]"
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    choices = json.loads(data).get("choices") or [{}]
+                    fragment = choices[0].get("delta", {}).get("content")
+                except (ValueError, AttributeError, IndexError) as e:
+                    raise LLMError(f"Unexpected stream event: {e}")
+                if fragment:
+                    yield fragment
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+class MockBackend:
+    """In-process deterministic answers (see agents/mock_llm_server.py); no network."""
+
+    name = "mock"
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    async def generate(self, prompt, model, options, timeout):
+        await asyncio.sleep(self.delay)
+        return mock_response(prompt)
+
+    async def stream(self, prompt, model, options, timeout):
+        await asyncio.sleep(self.delay)
+        for word in mock_response(prompt).split(" "):
+            yield word + " "
+
+    async def aclose(self):
+        pass
+
+
+BACKENDS = {
+    "ollama_http": OllamaHTTPBackend,
+    "ollama_local": LocalOllamaBackend,
+    "openai": OpenAIBackend,
+    "mock": MockBackend,
+}
+
+
+def make_backend(name=LLM_BACKEND, **kwargs):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM_BACKEND '{name}'. Choose from: {', '.join(BACKENDS)}")
+    return BACKENDS[name](**kwargs)
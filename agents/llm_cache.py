@@ -0,0 +1,116 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", "data/llm_cache.sqlite")
+CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 30 * 24 * 3600))          # seconds
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 50000))
+
+
+def cache_key(prompt, model, options):
+    """Content address for one generation: same prompt, model and options -> same key."""
+    payload = json.dumps({"prompt": prompt, "model": model, "options": options}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Disk-backed (SQLite) cache of LLM results with TTL expiry and
+    size-bounded LRU eviction. Safe to share between threads.
+    Other string results (e.g. web searches) can use their own table.
+    The database is opened on first use, so importing a module that defines a
+    cache creates no files.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, table="llm_cache"):
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.path = path
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """The open connection, created on first use; call with the lock held."""
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            db.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_last_used ON {self.table} (last_used)")
+            db.commit()
+            self._db = db
+        return self._db
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            row = db.execute(f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] > self.ttl:
+                db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                db.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            db.execute(f"UPDATE {self.table} SET last_used = ? WHERE key = ?", (now, key))
+            db.commit()
+            self.hits += 1
+            return row[0]
+
+    def contains(self, key):
+        """True if a live entry exists; unlike get() it leaves stats and recency alone."""
+        with self._lock:
+            row = self._connect().execute(f"SELECT created_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttl
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            db.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            count = db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            if count > self.max_entries:
+                # Evict the least recently used entries
+                overflow = count - self.max_entries
+                db.execute(
+                    f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} ORDER BY last_used LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+            db.commit()
+
+    def stats(self):
+        with self._lock:
+            size = self._connect().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": size,
+        }
+
+
+# Shared cache for classification results
+classification_cache = LLMCache()
@@ -0,0 +1,242 @@
+import os
+import time
+import asyncio
+import threading
+import logging
+from collections import Counter, deque
+from dotenv import load_dotenv
+from agents.circuit_breaker import CircuitBreaker
+from agents.llm_backends import make_backend, LLMError, LLM_BACKEND
+from agents.endpoint_pool import EndpointPool, LLM_ENDPOINTS
+from agents.hedging import HedgePolicy, LLM_HEDGE
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Requests allowed in flight at once, across every caller in the process
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", 4))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 45))  # CPU inference is slow
+
+
+class CircuitOpenError(LLMError):
+    """The endpoint is considered down; the request was not sent."""
+
+
+# Shared by both agents so one outage is detected once, not per issue
+breaker = CircuitBreaker("llm")
+# Latency history and budget for duplicate requests (only used with LLM_HEDGE)
+hedging = HedgePolicy()
+
+
+class AsyncLLMClient:
+    """
+    Shared asyncio client in front of one backend (see agents/llm_backends.py).
+    A semaphore bounds requests in flight, the circuit breaker fails fast while
+    the backend is down, and every request gets a timeout.
+    """
+
+    def __init__(self, backend, concurrency=LLM_CONCURRENCY, timeout=LLM_TIMEOUT, hedge=LLM_HEDGE):
+        self.backend = backend
+        self.timeout = timeout
+        self.hedge = hedge
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def generate(self, prompt, model, options, timeout=None):
+        """Run one non-streaming generation and return the response text."""
+        if self.hedge:
+            return await self._generate_hedged(prompt, model, options, timeout)
+        return await self._generate_once(prompt, model, options, timeout)
+
+    async def _generate_once(self, prompt, model, options, timeout=None, sent=None):
+        async with self._semaphore:
+            # Checked after queueing so requests waiting on the semaphore see a fresh trip
+            if not breaker.allow():
+                raise CircuitOpenError("LLM endpoint circuit is open, skipping request")
+            if sent:
+                sent.set()
+            started = time.monotonic()
+            try:
+                content = await self.backend.generate(prompt, model, options, timeout or self.timeout)
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception:
+                # Anything else (a malformed body, a bug) still has to settle a half-open probe
+                breaker.record_failure()
+                hedging.observe(options.get("num_predict"), time.monotonic() - started)
+                raise
+        breaker.record_success()
+        hedging.observe(options.get("num_predict"), time.monotonic() - started)
+        return content
+
+    async def _generate_hedged(self, prompt, model, options, timeout=None):
+        """
+        Send the request; if it has not answered after the hedge percentile of
+        recent latency (timed from when it was actually sent, not queued), send a
+        duplicate and take whichever answers first. The loser is cancelled.
+        """
+        delay = hedging.delay(options.get("num_predict"))
+        sent = asyncio.Event()
+        primary = asyncio.ensure_future(self._generate_once(prompt, model, options, timeout, sent))
+        if delay is None:
+            return await primary
+
+        waiting = asyncio.ensure_future(sent.wait())
+        await asyncio.wait({primary, waiting}, return_when=asyncio.FIRST_COMPLETED)
+        waiting.cancel()
+        if not primary.done():
+            await asyncio.wait({primary}, timeout=delay)
+        if primary.done() or not hedging.allow():
+            return await primary
+
+        # With an endpoint pool, the duplicate lands on the least-loaded replica
+        hedge = asyncio.ensure_future(self._generate_once(prompt, model, options, timeout))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            hedging.won()
+                        return task.result()
+            # Both failed: report the original request's error
+            return primary.result()
+        finally:
+            for task in (primary, hedge):
+                if not task.done():
+                    task.cancel()
+
+    async def stream(self, prompt, model, options, timeout=None):
+        """
+        Stream one generation, yielding text fragments as they arrive. Closing the
+        generator early drops the connection, which stops the generation server-side.
+        """
+        async with self._semaphore:
+            if not breaker.allow():
+                raise CircuitOpenError("LLM endpoint circuit is open, skipping request")
+            fragments = self.backend.stream(prompt, model, options, timeout or self.timeout)
+            answered = False
+            try:
+                async for fragment in fragments:
+                    if not answered:
+                        breaker.record_success()
+                        answered = True
+                    yield fragment
+                if not answered:
+                    breaker.record_success()
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception:
+                breaker.record_failure()
+                raise
+            finally:
+                await fragments.aclose()
+
+    async def aclose(self):
+        await self.backend.aclose()
+
+
+class StreamStats:
+    """Time-to-first-token and how streamed generations ended."""
+
+    def __init__(self, window=1000):
+        self._ttft = deque(maxlen=window)
+        self._outcomes = Counter()
+        self._lock = threading.Lock()
+
+    def start(self):
+        return time.monotonic()
+
+    def first_token(self, started):
+        with self._lock:
+            self._ttft.append(time.monotonic() - started)
+
+    def outcome(self, name):
+        with self._lock:
+            self._outcomes[name] += 1
+
+    def stats(self):
+        with self._lock:
+            ttft = sorted(self._ttft)
+            outcomes = dict(self._outcomes)
+        return {
+            "streams": sum(outcomes.values()),
+            "outcomes": outcomes,
+            "avg_ttft_ms": round(sum(ttft) / len(ttft) * 1000) if ttft else None,
+            "p95_ttft_ms": round(ttft[min(len(ttft) - 1, int(len(ttft) * 0.95))] * 1000) if ttft else None,
+        }
+
+
+# ---------------------- Background event loop ----------------------
+# The agents are called from plain synchronous code (Streamlit, scripts), so the
+# client lives on one long-lived loop in a daemon thread and everyone submits to it.
+
+_loop = None
+_client = None
+_lock = threading.Lock()
+
+
+def _ensure_loop():
+    global _loop, _client
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-client", daemon=True).start()
+            _client = asyncio.run_coroutine_threadsafe(_make_client(), _loop).result()
+    return _loop
+
+
+async def _make_client():
+    # Created on the loop thread so the semaphore and connections belong to it
+    if LLM_ENDPOINTS:
+        logger.info(f"LLM backend: {LLM_BACKEND} pool over {len(LLM_ENDPOINTS)} endpoints")
+        return AsyncLLMClient(EndpointPool(LLM_BACKEND, LLM_ENDPOINTS, **backend_options(LLM_BACKEND)),
+                              concurrency=LLM_CONCURRENCY)
+    logger.info(f"LLM backend: {LLM_BACKEND}")
+    return AsyncLLMClient(make_backend(LLM_BACKEND, **backend_options(LLM_BACKEND)), concurrency=LLM_CONCURRENCY)
+
+
+def backend_options(name):
+    # HTTP backends get one pooled connection per allowed request in flight
+    return {"connections": LLM_CONCURRENCY} if name in ("ollama_http", "openai") else {}
+
+
+def configure(concurrency=None):
+    """Override LLM_CONCURRENCY for this process; only takes effect before the first LLM call."""
+    global LLM_CONCURRENCY
+    with _lock:
+        if _client is not None:
+            logger.warning("LLM client already running; configure() ignored")
+            return False
+        if concurrency:
+            LLM_CONCURRENCY = concurrency
+    return True
+
+
+def get_client():
+    _ensure_loop()
+    return _client
+
+
+def endpoint_stats():
+    """Per-replica routing numbers when LLM_ENDPOINTS is set, otherwise None."""
+    backend = get_client().backend
+    return backend.stats() if isinstance(backend, EndpointPool) else None
+
+
+def run(coro):
+    """Run a coroutine on the shared loop and block until it finishes."""
+    return asyncio.run_coroutine_threadsafe(coro, _ensure_loop()).result()
+
+
+def run_all(coros):
+    """
+    Run coroutines concurrently on the shared loop and return their results in
+    order. A failing coroutine yields its exception instead of sinking the rest.
+    """
+    async def gather():
+        return await asyncio.gather(*coros, return_exceptions=True)
+    return run(gather())
@@ -0,0 +1,101 @@
+import os
+import json
+import hashlib
+import logging
+import joblib
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+
+logger = logging.getLogger(__name__)
+
+# Below this confidence the issue is passed on to the LLM
+LOCAL_CLASSIFIER_THRESHOLD = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", 0.8))
+# Fewer labeled issues than this and the local stage is skipped
+MIN_TRAINING_SAMPLES = int(os.getenv("LOCAL_CLASSIFIER_MIN_SAMPLES", 30))
+
+
+def model_path(repo):
+    return f"data/{repo.replace('/', '_')}_classifier.joblib"
+
+
+def issue_text(issue):
+    return f"{issue.get('title', '')}\n\n{issue.get('body', '')[:1000]}"
+
+
+def training_set(issues, label_mapper):
+    """Texts and targets for issues whose GitHub labels map to a class."""
+    texts, targets = [], []
+    for issue in issues:
+        label = label_mapper.map_labels(issue.get("labels", []))
+        if label:
+            texts.append(issue_text(issue))
+            targets.append(label)
+    return texts, targets
+
+
+def training_fingerprint(texts, targets, label_mapper):
+    """Hash of the training set and alias table; the model is retrained only when it changes."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(sorted(label_mapper.aliases.items())).encode("utf-8"))
+    # Order-independent: the snapshot is rewritten on every fetch and may reorder issues
+    for text, target in sorted(zip(texts, targets)):
+        digest.update(json.dumps([text, target]).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class LocalClassifier:
+    """TF-IDF + logistic regression trained on a repo's already-labeled issues."""
+
+    def __init__(self, model, fingerprint=None):
+        self.model = model
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def train(cls, texts, targets, path, fingerprint=None):
+        """Fit on the labeled issues from training_set(); returns None if there is too little data."""
+        if len(texts) < MIN_TRAINING_SAMPLES or len(set(targets)) < 2:
+            logger.info(f"Local classifier: only {len(texts)} labeled issues, skipping training")
+            return None
+
+        model = make_pipeline(
+            TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True, max_features=20000),
+            LogisticRegression(max_iter=1000, class_weight="balanced")
+        )
+        model.fit(texts, targets)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        joblib.dump({"model": model, "fingerprint": fingerprint}, path)
+        logger.info(f"Local classifier trained on {len(texts)} issues ({sorted(set(targets))})")
+        return cls(model, fingerprint)
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return None
+        saved = joblib.load(path)
+        if not isinstance(saved, dict):
+            # Saved before fingerprints existed; never matches, so it is retrained
+            return cls(saved)
+        return cls(saved["model"], saved["fingerprint"])
+
+    def predict(self, issue):
+        """Return (label, confidence) for one issue."""
+        probabilities = self.model.predict_proba([issue_text(issue)])[0]
+        best = probabilities.argmax()
+        return self.model.classes_[best], float(probabilities[best])
+
+
+def load_or_train(repo, issues, label_mapper):
+    """
+    Reuse the persisted model if it was trained on exactly this training set and
+    alias table, otherwise retrain on issues (an iterator over the parsed snapshot).
+    Training targets come from the same label mapping used to short-circuit the LLM.
+    """
+    path = model_path(repo)
+    texts, targets = training_set(issues, label_mapper)
+    fingerprint = training_fingerprint(texts, targets, label_mapper)
+    saved = LocalClassifier.load(path)
+    if saved and saved.fingerprint == fingerprint:
+        logger.info("Local classifier: training set unchanged, reusing saved model")
+        return saved
+    return LocalClassifier.train(texts, targets, path, fingerprint) or saved
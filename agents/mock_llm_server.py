@@ -0,0 +1,112 @@
+"""
+Deterministic stand-in for an Ollama server, for tests and offline benchmarks.
+
+The same prompt always gets the same answer, shaped like what the agents expect
+(single label, numbered batch labels, combined label + action, DevRel action).
+
+    python -m agents.mock_llm_server --port 11435
+    OLLAMA_API_URL=http://localhost:11435/api/generate streamlit run main.py
+"""
+import re
+import json
+import time
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+NUMBERED_ISSUE = re.compile(r"^(\d+)\. (.*)$", re.MULTILINE)
+ISSUE_TYPE = re.compile(r"^Issue Type: (\w+)", re.MULTILINE)
+
+KEYWORDS = [
+    ("bug", ["bug", "error", "crash", "broken", "fail", "exception"]),
+    ("documentation", ["docs", "documentation", "readme", "typo", "guide"]),
+    ("feature", ["feature", "enhancement", "support for", "add ", "implement"]),
+    ("question", ["how", "why", "what", "question", "?"]),
+]
+
+ACTIONS = {
+    "bug": "Publish a troubleshooting guide for this failure with reproduction steps, the root cause and a verified workaround. Target developers hitting the error in production. Expected outcome: fewer duplicate bug reports.",
+    "feature": "Write a short design proposal post describing the requested capability, invite community feedback on the API shape and link a tracking issue. Target power users and contributors. Expected outcome: a validated roadmap item.",
+    "question": "Turn the answer into a FAQ entry with a minimal working example and link it from the getting started docs. Target new users setting up the project. Expected outcome: fewer repeated questions.",
+    "documentation": "Rewrite the affected documentation page with a runnable example, a clear prerequisites section and screenshots. Target developers following the docs for the first time. Expected outcome: smoother onboarding.",
+    "discussion": "Open a structured community discussion thread summarising the options raised, run a poll and report the outcome in the next community update. Target active contributors. Expected outcome: a clear decision.",
+}
+
+
+def mock_label(text):
+    text = text.lower()
+    for label, words in KEYWORDS:
+        if any(word in text for word in words):
+            return label
+    return "discussion"
+
+
+def mock_response(prompt):
+    """Answer a prompt the way a well-behaved model would, deterministically."""
+    stripped = prompt.rstrip()
+    if stripped.endswith("Classifications:"):
+        return "\n".join(f"{n}: {mock_label(text)}" for n, text in NUMBERED_ISSUE.findall(prompt))
+    if stripped.endswith("Classification:"):
+        return mock_label(prompt.split("Issue:", 1)[-1])
+    if stripped.endswith("Label:"):
+        label = mock_label(prompt.split("Title:", 1)[-1].split("Answer in exactly")[0])
+        return f" {label}\nAction: {ACTIONS[label]}"
+    match = ISSUE_TYPE.search(prompt)
+    label = match.group(1) if match and match.group(1) in ACTIONS else mock_label(prompt)
+    return ACTIONS[label]
+
+
+class MockOllamaHandler(BaseHTTPRequestHandler):
+    """Serves /api/generate (streaming and not) and /api/tags for health checks."""
+
+    delay = 0.0
+
+    def do_GET(self):
+        self.send_json(200, {"models": [{"name": "tinyllama"}]})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/api/generate":
+            self.send_json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        content = mock_response(payload.get("prompt", ""))
+        time.sleep(self.delay)
+
+        if not payload.get("stream", True):
+            self.send_json(200, {"model": payload.get("model"), "response": content, "done": True})
+            return
+
+        # Ollama's streaming format: one JSON object per line, word by word
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        for word in re.findall(r"\s*\S+", content):
+            self.wfile.write(json.dumps({"response": word, "done": False}).encode() + b"\n")
+            self.wfile.flush()
+        self.wfile.write(json.dumps({"response": "", "done": True}).encode() + b"\n")
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=11435, delay=0.0):
+    MockOllamaHandler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", port), MockOllamaHandler)
+    print(f"🧪 Mock LLM server on http://127.0.0.1:{port}/api/generate")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deterministic Ollama stand-in")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before answering")
+    args = parser.parse_args()
+    serve(args.port, args.delay)
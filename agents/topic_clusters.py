@@ -0,0 +1,71 @@
+import os
+import logging
+from collections import Counter
+from scipy.sparse import vstack
+from sklearn.feature_extraction.text import TfidfVectorizer
+from agents.local_classifier import issue_text
+
+logger = logging.getLogger(__name__)
+
+# Share one DevRel suggestion between issues about the same topic
+CLUSTER_ISSUES = os.getenv("CLUSTER_ISSUES", "true").lower() in ("1", "true", "yes")
+# Minimum cosine similarity to a cluster's representative to join it
+CLUSTER_SIMILARITY = float(os.getenv("CLUSTER_SIMILARITY", 0.5))
+
+
+class TopicClusters:
+    """
+    Streaming leader clustering within each predicted_label. The TF-IDF space is
+    fitted once on the whole snapshot; each issue is then compared (one sparse
+    matrix product) against the representatives of its label's clusters and
+    joins the most similar one above the threshold, or founds a new cluster.
+    Assignment only depends on stream order, so a resumed run rebuilds the same
+    cluster ids by replaying the issues it already finished.
+    """
+
+    def __init__(self, issues, threshold=CLUSTER_SIMILARITY):
+        self.threshold = threshold
+        self.vectorizer = TfidfVectorizer(stop_words="english", sublinear_tf=True, max_features=20000)
+        self.vectorizer.fit(issue_text(issue) for issue in issues)
+        self.representatives = {}  # label -> sparse matrix, one normalized row per cluster
+        self.sizes = Counter()
+        self.actions = {}  # cluster_id -> DevRel action shared by its members
+
+    def assign(self, issue):
+        """Set issue["cluster_id"]; returns True if the issue founded a new cluster."""
+        label = issue.get("predicted_label", "unknown")
+        vector = self.vectorizer.transform([issue_text(issue)])
+        clusters = self.representatives.get(label)
+
+        if clusters is not None and vector.nnz:
+            similarities = (clusters @ vector.T).toarray().ravel()
+            best = similarities.argmax()
+            if similarities[best] >= self.threshold:
+                issue["cluster_id"] = f"{label}-{best}"
+                self.sizes[issue["cluster_id"]] += 1
+                return False
+
+        self.representatives[label] = vector if clusters is None else vstack([clusters, vector]).tocsr()
+        issue["cluster_id"] = f"{label}-{self.representatives[label].shape[0] - 1}"
+        self.sizes[issue["cluster_id"]] += 1
+        return True
+
+    def shared_action(self, issue):
+        return self.actions.get(issue.get("cluster_id"))
+
+    def share(self, issue):
+        """
+        Offer an issue's suggestion to the rest of its cluster (the first one wins).
+        Only suggestions the LLM wrote are shared; a fallback template was picked
+        from this issue's keywords, so the other members get their own.
+        """
+        action = issue.get("devrel_action")
+        if action and action != "No suggestion available" and issue.get("devrel_source", "llm") == "llm":
+            self.actions.setdefault(issue.get("cluster_id"), action)
+
+    def stats(self):
+        return {
+            "clusters": len(self.sizes),
+            "largest": self.sizes.most_common(1)[0][1] if self.sizes else 0,
+            "clustered_issues": sum(size for size in self.sizes.values() if size > 1),
+        }
@@ -1,5 +1,6 @@
 import streamlit as st
 from run_pipeline import analyze_repository
+from tools.streamlit_progress import StreamlitProgress
 
 st.set_page_config(page_title="DevRel AI Assistant", layout="centered")
 
@@ -121,7 +122,7 @@ if st.session_state.get("analyzing"):
     repo = st.session_state["repo"]
     with st.spinner("Analyzing repository..."):
         try:
-            analyze_repository(repo)
+            analyze_repository(repo, progress=StreamlitProgress())
             st.session_state["analyzing"] = False
             st.session_state["last_repo"] = repo
             st.session_state["jump_to_dashboard"] = True
@@ -6,8 +6,11 @@ import streamlit as st
 import json
 from collections import Counter
 import pandas as pd
+import re
 import plotly.graph_objects as go
-from run_pipeline import analyze_repository
+from run_pipeline import analyze_repository, devrel_path, fetch_web_context
+from tools.streamlit_progress import StreamlitProgress
+from tools.ndjson import read_ndjson, write_ndjson
 
 # ---------------------- Constants ----------------------
 HISTORY_FILE = "search_history.json"
@@ -25,9 +28,18 @@ def save_history(history):
         json.dump(history[:5], f)
 
 def load_issues(file_path):
+    if file_path.endswith(".ndjson"):
+        return list(read_ndjson(file_path))
     with open(file_path, "r", encoding="utf-8") as f:
         return json.load(f)
 
+def save_issues(file_path, issues):
+    if file_path.endswith(".ndjson"):
+        write_ndjson(file_path, issues)
+    else:
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(issues, f, indent=2)
+
 def count_labels(issues, key):
     values = [issue.get(key, "unknown") for issue in issues]
     return Counter(values)
@@ -86,6 +98,36 @@ def create_github_link_button(issue):
                    'margin: 4px 0;">🌐 View on GitHub</a>', 
                    unsafe_allow_html=True)
 
+def format_links(text):
+    return re.sub(
+        r"🔗 (https?://\S+)",
+        r"🔗 <a href='\1' target='_blank' rel='noopener noreferrer'>\1</a>",
+        text
+    )
+
+def render_web_context(issue, section):
+    """
+    Show the issue's Tavily snippets. Issues analyzed without a web search get a
+    button that searches once and saves the result into the analysis file.
+    """
+    ctx = issue.get("web_context", "").strip()
+    if not ctx and not issue.get("web_skipped"):
+        return
+    with st.expander("🌐 Web Context (Tavily Snippets)"):
+        if not ctx:
+            # Streamlit renders expander bodies eagerly, so the search waits for a click
+            if not st.button("🔎 Fetch web context", key=f"{section}_fetch_{issue.get('number')}"):
+                st.caption("Not searched during analysis; fetched on demand and saved for next time.")
+                return
+            with st.spinner("Searching the web..."):
+                fetch_web_context(issue)
+                save_issues(json_path, issues)
+            ctx = issue.get("web_context", "").strip()
+            if not ctx:
+                st.info("No web results found for this issue.")
+                return
+        st.markdown(format_links(ctx), unsafe_allow_html=True)
+
 # ---------------------- Session Setup ----------------------
 if "search_history" not in st.session_state:
     st.session_state.search_history = load_history()
@@ -147,10 +189,16 @@ st.sidebar.markdown("## 🔎 Analyze a GitHub Repository")
 # Manual input for new repo
 repo_input = st.sidebar.text_input("Enter repo (format: owner/repo)", value=st.session_state.repo_input, key="repo_manual_input")
 
+force_recompute = st.sidebar.checkbox("♻️ Force full recompute", value=False, key="force_recompute",
+                                      help="Ignore progress saved by an interrupted run and start over")
+lazy_web = st.sidebar.checkbox("🌐 Fetch web context on demand", value=False, key="lazy_web",
+                               help="Skip web searches during analysis; search an issue when you open its web context")
+
 if st.sidebar.button("🚀 Run Analysis", key="analyze_new_repo"):
     with st.spinner("Analyzing repository..."):
         try:
-            analyze_repository(repo_input)
+            analyze_repository(repo_input, force=force_recompute, web_search="lazy" if lazy_web else "eager",
+                               progress=StreamlitProgress())
             st.session_state.repo_input = repo_input
             if repo_input not in st.session_state.search_history:
                 st.session_state.search_history.insert(0, repo_input)
@@ -174,7 +222,10 @@ if st.sidebar.button("🧹 Clear History"):
 
 # ---------------------- Load Data ----------------------
 repo_key = st.session_state.repo_input.replace("/", "_")
-json_path = f"data/{repo_key}_devrel.json"
+json_path = devrel_path(st.session_state.repo_input)
+if not os.path.exists(json_path):
+    # Analyses from before the NDJSON pipeline
+    json_path = f"data/{repo_key}_devrel.json"
 
 try:
     issues = load_issues(json_path)
@@ -260,6 +311,17 @@ if top_actions:
 else:
     st.warning("❌ No DevRel suggestions found in the current filtered results.")
 
+# ---------------------- Topic Clusters ----------------------
+cluster_sizes = Counter(i["cluster_id"] for i in filtered_issues if i.get("cluster_id"))
+shared_clusters = [(cid, size) for cid, size in cluster_sizes.most_common() if size > 1]
+if shared_clusters:
+    with st.expander(f"🧩 {len(shared_clusters)} Topic Clusters sharing a DevRel suggestion", expanded=False):
+        render_bar_chart(dict(shared_clusters[:15]), "Issues per Topic Cluster")
+        for cid, size in shared_clusters[:10]:
+            members = [i for i in filtered_issues if i.get("cluster_id") == cid]
+            st.markdown(f"**{cid}** — {size} issues, e.g. _#{members[0]['number']} {members[0]['title']}_")
+            st.caption(members[0].get("devrel_action", "No suggestion"))
+
 # ---------------------- Misclassified Issues ----------------------
 # Fix: Compare with label names, not the full label objects
 misclassified = []
@@ -357,6 +419,8 @@ if st.toggle("🔽 Show all issues with full context", key="show_full_context"):
             
             st.write(issue.get("body", ""))
             st.markdown(f"🗓️ Created: `{issue.get('created_at', 'N/A')}`")
+            if cluster_sizes.get(issue.get("cluster_id"), 0) > 1:
+                st.markdown(f"🧩 Cluster `{issue['cluster_id']}` ({cluster_sizes[issue['cluster_id']]} similar issues)")
 
             # DevRel Tag
             devrel = issue.get("devrel_action", "").strip()
@@ -372,17 +436,7 @@ if st.toggle("🔽 Show all issues with full context", key="show_full_context"):
                     unsafe_allow_html=True
                 )
 
-            if (ctx := issue.get("web_context", "").strip()):
-                with st.expander("🌐 Web Context (Tavily Snippets)"):
-                    import re
-                    def format_links(text):
-                        return re.sub(
-                            r"🔗 (https?://\S+)",
-                            r"🔗 <a href='\1' target='_blank' rel='noopener noreferrer'>\1</a>",
-                            text
-                        )
-                    formatted_ctx = format_links(ctx)
-                    st.markdown(formatted_ctx, unsafe_allow_html=True)
+            render_web_context(issue, "full")
 
             st.markdown("</div>", unsafe_allow_html=True)
 
@@ -417,17 +471,7 @@ try:
                     unsafe_allow_html=True
                 )
 
-            if (ctx := issue.get("web_context", "").strip()):
-                with st.expander("🌐 Web Context (Tavily Snippets)"):
-                    import re
-                    def format_links(text):
-                        return re.sub(
-                            r"🔗 (https?://\S+)",
-                            r"🔗 <a href='\1' target='_blank' rel='noopener noreferrer'>\1</a>",
-                            text
-                        )
-                    formatted_ctx = format_links(ctx)
-                    st.markdown(formatted_ctx, unsafe_allow_html=True) 
+            render_web_context(issue, "recent")
 
             st.markdown("</div>", unsafe_allow_html=True)
 except Exception as e:
@@ -1,8 +1,11 @@
 import json
 import csv
 from collections import Counter
+from tools.ndjson import read_ndjson
 
 def load_issues(file_path):
+    if file_path.endswith(".ndjson"):
+        return list(read_ndjson(file_path))
     with open(file_path, "r", encoding="utf-8") as f:
         return json.load(f)
 
@@ -1,12 +1,28 @@
-from tools.github_api import fetch_issues
-from tools.github_parser import load_issues
-from agents.classifier_agent import classify_issue
-from agents.devrel_agent import recommend_devrel_action
-from tools.tavily_search import search_tavily_snippets
-import os, json
+from tools.github_api import fetch_issues, fetch_issues_graphql, snapshot_path, parsed_path, quota_stats
+from tools.github_parser import iter_issues
+from tools.ndjson import read_ndjson, append_ndjson
+from tools.checkpoint import Checkpoint, STAGES
+from tools.delta import PreviousResults
+from agents.classifier_agent import classify_issue_async, classify_issues_batch_async
+from agents.llm_cache import classification_cache
+from agents.local_classifier import load_or_train, LOCAL_CLASSIFIER_THRESHOLD
+from tools.label_mapping import LabelMapper
+from agents.devrel_agent import recommend_devrel_action_async, stream_stats
+from agents.combined_agent import classify_and_recommend_async
+from agents.topic_clusters import TopicClusters, CLUSTER_ISSUES
+from agents.llm_client import run_all, configure, LLM_CONCURRENCY, breaker, endpoint_stats, hedging
+from tools.tavily_search import search_tavily_snippets, search_cache, strip_noise
+from tools.web_enrichment import WebSearcher, SearchBudgetExceeded
+from tools.enrichment_policy import EnrichmentPolicy
+from tools.stage_pipeline import StagePipeline
+from tools.progress import Progress, LogProgress
+import os
+import sys
+import json
 import logging
+import argparse
+import contextlib
 from collections import Counter
-import streamlit as st
 
 # Configure logging
 logging.basicConfig(
@@ -15,6 +31,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Issues packed into one classification prompt (1 = one LLM call per issue)
+CLASSIFY_BATCH_SIZE = int(os.getenv("CLASSIFY_BATCH_SIZE", 8))
+# "eager" searches the web during analysis, "lazy" leaves it to the dashboard
+WEB_SEARCH_MODE = os.getenv("WEB_SEARCH", "eager")
+# DevRel suggestions requested at once by the suggest stage
+SUGGEST_CONCURRENCY = int(os.getenv("SUGGEST_CONCURRENCY", LLM_CONCURRENCY * 2))
+# Ask for label and DevRel action in a single generation instead of two calls
+COMBINED_AGENT = os.getenv("COMBINED_AGENT", "false").lower() in ("1", "true", "yes")
+
+def devrel_path(repo):
+    return f"data/{repo.replace('/', '_')}_devrel.ndjson"
+
+def checkpoint_path(repo):
+    return f"data/{repo.replace('/', '_')}_checkpoint.ndjson"
+
 # Clean up Tavily snippet content
 def clean_snippet(text):
     if not text:
@@ -24,182 +55,565 @@ def clean_snippet(text):
     cleaned = " ".join(lines)
     return cleaned[:300] + "..." if len(cleaned) > 300 else cleaned
 
-def analyze_repository(repo: str):
+# ---------------------- Pipeline Stages ----------------------
+# Each stage takes an iterator of issues and yields them enriched, so only the
+# issue currently being worked on is held in memory. Stages already recorded in
+# the checkpoint (issue["_stages"]) are skipped when resuming.
+
+def resume_stage(issues, finished, saved):
+    """Drop issues finished by an earlier run and restore partial stage results."""
+    for issue in issues:
+        if issue.get("number") in finished:
+            continue
+        entry = saved.get(issue.get("number"))
+        issue["_stages"] = entry["stages"] if entry else set()
+        if entry:
+            issue.update(entry["fields"])
+            logger.info(f"Resuming issue #{issue.get('number')} after stages: {sorted(entry['stages'])}")
+        yield issue
+
+def reuse_stage(issues, previous, stats):
     """
-    Enhanced repository analysis with better error handling and progress tracking
+    Carry over the previous analysis for issues whose content has not changed.
+    Only stages that succeeded are reused; failed ones, and searches that were
+    deferred or over budget last time, go through the pipeline again.
     """
-    if "/" not in repo:
-        raise ValueError("Invalid repo format. Use 'owner/repo'.")
-    
-    logger.info(f"Starting analysis for repository: {repo}")
-    
-    # Create progress tracking for Streamlit
-    if 'st' in globals():
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-    
-    try:
-        # Step 1: Fetch issues from GitHub
-        logger.info("Fetching issues from GitHub...")
-        if 'st' in globals():
-            status_text.text("📡 Fetching issues from GitHub...")
-            progress_bar.progress(10)
-        
-        issues = fetch_issues(repo)
-        logger.info(f"Fetched {len(issues)} issues")
-        
-        if not issues:
-            raise ValueError("No issues found or GitHub API failed")
-        
-        # Step 2: Save raw issues
-        os.makedirs("data", exist_ok=True)
-        raw_path = f"data/{repo.replace('/', '_')}_issues.json"
-        with open(raw_path, "w", encoding="utf-8") as f:
-            json.dump(issues, f, indent=2)
-        
-        if 'st' in globals():
-            status_text.text("📝 Processing issues...")
-            progress_bar.progress(20)
-        
-        # Step 3: Parse issues
-        parsed = load_issues(raw_path)
-        enriched = []
-        
-        total_issues = len(parsed)
-        logger.info(f"Processing {total_issues} parsed issues")
-        
-        # Counters for tracking success/failure
-        successful_classifications = 0
-        successful_devrel_suggestions = 0
-        successful_web_searches = 0
-        
-        for i, issue in enumerate(parsed):
-            logger.info(f"Processing issue #{issue.get('number', i)}: {issue.get('title', 'No title')[:50]}")
-            
-            # Update progress
-            if 'st' in globals():
-                progress = 20 + (i / total_issues) * 60  # 20% to 80%
-                progress_bar.progress(int(progress))
-                status_text.text(f"🤖 Processing issue {i+1}/{total_issues}: {issue.get('title', 'No title')[:40]}...")
-            
-            # Step 4: Classify issue
-            try:
-                issue_text = f"{issue.get('title', '')}\n\n{issue.get('body', '')}"
-                label = classify_issue(issue_text)
+    for issue in issues:
+        if not issue["_stages"]:
+            reused = previous.lookup(issue)
+            if reused:
+                for fields in reused.values():
+                    issue.update(fields)
+                issue["_stages"] = set(reused)
+                if len(reused) == len(STAGES):
+                    stats["reused_issues"] += 1
+        yield issue
+
+def issues_to_search(issues, finished, saved, previous):
+    """
+    How many issues will reach the search policy: those not finished, without a
+    checkpointed search and without a reusable one from the previous analysis.
+    Mirrors resume_stage and reuse_stage, so the policy's budget is spread over
+    the issues it actually decides on.
+    """
+    count = 0
+    for issue in issues:
+        number = issue.get("number")
+        if number in finished:
+            continue
+        entry = saved.get(number)
+        if entry:
+            count += "searched" not in entry["stages"]
+        else:
+            count += "searched" not in (previous.lookup(issue) or {})
+    return count
+
+def windows(issues, size):
+    """Group an issue stream into lists of up to size issues, keeping order."""
+    window = []
+    for issue in issues:
+        window.append(issue)
+        if len(window) >= size:
+            yield window
+            window = []
+    if window:
+        yield window
+
+def shortcut_labels(chunk, checkpoint, local_model=None, threshold=LOCAL_CLASSIFIER_THRESHOLD,
+                    label_mapper=None):
+    """
+    Label what can be labeled without the LLM: unambiguous GitHub labels first,
+    then the local model when it is confident enough. Returns the issues left over.
+    """
+    needs_llm = []
+    for issue in chunk:
+        if "classified" in issue["_stages"]:
+            continue
+        if label_mapper:
+            label = label_mapper.map_labels(issue.get("labels", []))
+            if label:
+                issue["predicted_label"] = label
+                issue["label_source"] = "github_label"
+                logger.info(f"Issue #{issue.get('number')} labeled {label} from GitHub labels {issue.get('labels')}")
+                checkpoint.record(issue, "classified")
+                continue
+        if local_model:
+            label, confidence = local_model.predict(issue)
+            if confidence >= threshold:
                 issue["predicted_label"] = label
-                
+                issue["label_source"] = "local"
+                logger.info(f"Issue #{issue.get('number')} classified locally as: {label} ({confidence:.2f})")
+                checkpoint.record(issue, "classified")
+                continue
+        needs_llm.append(issue)
+    return needs_llm
+
+async def llm_labels(issues):
+    """One batched LLM call for a chunk (or a single call for a chunk of one); returns (label, source) pairs."""
+    texts = [f"{issue.get('title', '')}\n\n{issue.get('body', '')}" for issue in issues]
+    if len(texts) > 1:
+        return await classify_issues_batch_async(texts, with_source=True)
+    return [await classify_issue_async(texts[0], with_source=True)]
+
+def combined_results(issues, checkpoint):
+    """Label and suggest for each issue with one combined LLM call apiece."""
+    results = run_all([classify_and_recommend_async(issue) for issue in issues])
+    for issue, result in zip(issues, results):
+        if isinstance(result, Exception):
+            logger.error(f"Combined agent failed for issue #{issue.get('number')}: {result}")
+            result = {"predicted_label": "unknown", "label_source": "error",
+                      "devrel_action": "No suggestion available", "devrel_source": "error"}
+        issue.update(result)
+        logger.info(f"Issue #{issue.get('number')} classified as: {issue['predicted_label']} "
+                    f"(combined call, {issue['label_source']})")
+        checkpoint.record(issue, "classified")
+        checkpoint.record(issue, "suggested")
+        # The suggest stage has nothing left to do for this issue
+        issue["_stages"].add("suggested")
+
+def classify_stage(issues, checkpoint, batch_size=CLASSIFY_BATCH_SIZE, local_model=None,
+                   threshold=LOCAL_CLASSIFIER_THRESHOLD, label_mapper=None, combined=COMBINED_AGENT,
+                   concurrency=LLM_CONCURRENCY):
+    """
+    Classify in chunks of batch_size issues. Up to `concurrency` chunks are sent
+    to the LLM at once; issues are yielded in their original order.
+    With combined=True, issues that need the LLM get label and DevRel action
+    from one call each instead of a batched classification.
+    """
+    for window in windows(issues, batch_size * concurrency):
+        chunks = [
+            shortcut_labels(window[i:i + batch_size], checkpoint, local_model, threshold, label_mapper)
+            for i in range(0, len(window), batch_size)
+        ]
+        chunks = [chunk for chunk in chunks if chunk]
+
+        if combined:
+            combined_results([issue for chunk in chunks for issue in chunk], checkpoint)
+            yield from window
+            continue
+
+        results = run_all([llm_labels(chunk) for chunk in chunks])
+
+        for chunk, labels in zip(chunks, results):
+            if isinstance(labels, Exception):
+                logger.error(f"Classification failed for issues {[issue.get('number') for issue in chunk]}: {labels}")
+                labels = [("unknown", "error")] * len(chunk)
+            for issue, (label, source) in zip(chunk, labels):
+                issue["predicted_label"] = label
+                issue["label_source"] = source
                 if label != "unknown":
-                    successful_classifications += 1
-                    logger.info(f"Issue #{issue.get('number')} classified as: {label}")
+                    logger.info(f"Issue #{issue.get('number')} classified as: {label} ({source})")
                 else:
                     logger.warning(f"Issue #{issue.get('number')} classification failed")
-                    
-            except Exception as e:
-                logger.error(f"Classification failed for issue #{issue.get('number')}: {e}")
-                issue["predicted_label"] = "unknown"
-            
-            # Step 5: Web search with Tavily
+                checkpoint.record(issue, "classified")
+
+        yield from window
+
+def cluster_stage(issues, clusters):
+    """Group each classified issue with similar issues of the same label."""
+    for issue in issues:
+        if clusters:
+            clusters.assign(issue)
+        yield issue
+
+def search_query(issue):
+    # Code and URLs would eat the body budget without helping the search
+    return f"{issue.get('title', '')} {strip_noise(issue.get('body', ''))[:150]}"
+
+def apply_web_snippets(issue, web_snippets):
+    """Clean search results and store them on the issue as web_snippets and web_context."""
+    # Coalesced searches share one result list, so clean a copy
+    web_snippets = [dict(s) for s in web_snippets]
+
+    # Clean snippets
+    for s in web_snippets:
+        s["content"] = clean_snippet(s.get("content", ""))
+
+    # Format context for LLM
+    tavily_context = "\n\n".join(
+        f"🔹 {s.get('title', 'No title')}\n{s.get('content', '')}\n🔗 {s.get('url', '')}"
+        for s in web_snippets if s.get("content")
+    )
+
+    issue["web_snippets"] = web_snippets
+    issue["web_context"] = tavily_context[:1000]  # Limit context size
+    issue.pop("web_skipped", None)
+
+def fetch_web_context(issue, depth="advanced"):
+    """Search the web for one issue right now (used for on-demand context)."""
+    apply_web_snippets(issue, search_tavily_snippets(search_query(issue), depth=depth))
+    return issue
+
+def search_submit_stage(issues, searcher, policy, checkpoint):
+    """
+    Start each issue's web search in the background; the LLM stages carry on meanwhile.
+    The policy picks the search depth, or skips the issue when it is not worth the budget.
+    """
+    for issue in issues:
+        if "searched" not in issue["_stages"]:
+            query = search_query(issue)
+            depth, reason = policy.decide(
+                issue, lambda depth: searcher.is_cached(query, depth), searcher.spent()
+            )
+            if depth:
+                issue["_search"] = searcher.submit(query, depth=depth)
+            else:
+                logger.info(f"Skipping web search for issue #{issue.get('number')}: {reason}")
+                issue["web_snippets"] = []
+                issue["web_context"] = ""
+                issue["web_skipped"] = reason
+                checkpoint.record(issue, "searched")
+        yield issue
+
+def search_join_stage(issues, checkpoint, policy=None):
+    """Attach the finished search results (waiting only if a search is still running)."""
+    for issue in issues:
+        future = issue.pop("_search", None)
+        if future is not None:
             try:
-                query = f"{issue.get('title', '')} {issue.get('body', '')[:150]}"
-                web_snippets = search_tavily_snippets(query)
-                
-                # Clean snippets
-                for s in web_snippets:
-                    s["content"] = clean_snippet(s.get("content", ""))
-                
-                # Format context for LLM
-                tavily_context = "\n\n".join(
-                    f"🔹 {s.get('title', 'No title')}\n{s.get('content', '')}\n🔗 {s.get('url', '')}"
-                    for s in web_snippets if s.get("content")
-                )
-                
-                issue["web_snippets"] = web_snippets
-                issue["web_context"] = tavily_context[:1000]  # Limit context size
-                
-                if web_snippets:
-                    successful_web_searches += 1
-                    logger.info(f"Found {len(web_snippets)} web snippets for issue #{issue.get('number')}")
-                
+                apply_web_snippets(issue, future.result())
+                if issue["web_snippets"]:
+                    logger.info(f"Found {len(issue['web_snippets'])} web snippets for issue #{issue.get('number')}")
+
+            except SearchBudgetExceeded as e:
+                # Refused just before reaching the API, after the policy had allowed it
+                logger.info(f"Skipping web search for issue #{issue.get('number')}: time_budget")
+                issue["web_snippets"] = []
+                issue["web_context"] = ""
+                issue["web_skipped"] = "time_budget"
+                if policy:
+                    # Issues sharing a coalesced search see the same exception
+                    policy.refund("time_budget", searched=not getattr(e, "_refunded", False))
+                    e._refunded = True
+
             except Exception as e:
                 logger.error(f"Tavily search failed for issue #{issue.get('number')}: {e}")
                 issue["web_snippets"] = []
                 issue["web_context"] = ""
-            
-            # Step 6: Get DevRel suggestion
+
+            checkpoint.record(issue, "searched")
+
+        yield issue
+
+def suggest_stage(issues, checkpoint, clusters=None, concurrency=SUGGEST_CONCURRENCY):
+    """
+    Generate DevRel suggestions for up to `concurrency` issues at a time, keeping order.
+    With clusters, only the first issue of each topic cluster reaches the LLM and
+    the rest of the cluster gets the same suggestion.
+    """
+    for window in windows(issues, concurrency):
+        generate, followers, claimed = [], [], set()
+        for issue in window:
+            if "suggested" in issue["_stages"]:
+                if clusters:
+                    clusters.share(issue)
+            elif clusters and (clusters.shared_action(issue) or issue.get("cluster_id") in claimed):
+                followers.append(issue)
+            else:
+                generate.append(issue)
+                claimed.add(issue.get("cluster_id"))
+
+        results = run_all([recommend_devrel_action_async(issue, with_source=True) for issue in generate])
+
+        # Followers whose representative produced nothing are generated individually
+        for issue, suggestion in zip(generate, results):
+            record_suggestion(issue, suggestion, checkpoint, clusters)
+        orphans = [issue for issue in followers if not clusters.shared_action(issue)]
+        results = run_all([recommend_devrel_action_async(issue, with_source=True) for issue in orphans])
+        for issue, suggestion in zip(orphans, results):
+            record_suggestion(issue, suggestion, checkpoint, clusters)
+
+        for issue in followers:
+            if issue not in orphans:
+                issue["devrel_action"] = clusters.shared_action(issue)
+                issue["devrel_source"] = "cluster"
+                logger.info(f"DevRel suggestion for issue #{issue.get('number')} shared from cluster {issue['cluster_id']}")
+                checkpoint.record(issue, "suggested")
+
+        yield from window
+
+def record_suggestion(issue, result, checkpoint, clusters=None):
+    """Store a (suggestion, source) result from the DevRel agent on the issue."""
+    if isinstance(result, Exception):
+        logger.error(f"DevRel suggestion failed for issue #{issue.get('number')}: {result}")
+        result = ("No suggestion available", "error")
+    suggestion, issue["devrel_source"] = result
+    issue["devrel_action"] = suggestion
+
+    if suggestion and suggestion != "No suggestion available":
+        logger.info(f"DevRel suggestion for issue #{issue.get('number')}: {suggestion[:50]}...")
+    else:
+        logger.warning(f"No DevRel suggestion for issue #{issue.get('number')}")
+
+    if clusters:
+        clusters.share(issue)
+    checkpoint.record(issue, "suggested")
+
+def tally(issue, stats, label_counts, label_sources):
+    """Count one finished issue towards the run summary."""
+    label_counts[issue.get("predicted_label", "unknown")] += 1
+    label_sources[issue.get("label_source", "llm")] += 1
+    if issue.get("predicted_label", "unknown") != "unknown":
+        stats["successful_classifications"] += 1
+    if issue.get("web_snippets"):
+        stats["successful_web_searches"] += 1
+    suggestion = issue.get("devrel_action")
+    if suggestion and suggestion != "No suggestion available":
+        stats["successful_devrel_suggestions"] += 1
+
+def analyze_repository(repo: str, backend: str = "rest", force: bool = False,
+                       batch_size: int = CLASSIFY_BATCH_SIZE,
+                       local_threshold: float = LOCAL_CLASSIFIER_THRESHOLD,
+                       combined: bool = COMBINED_AGENT,
+                       cluster: bool = CLUSTER_ISSUES,
+                       web_search: str = WEB_SEARCH_MODE,
+                       workers: int = None,
+                       out_path: str = None,
+                       progress: Progress = None):
+    """
+    Enhanced repository analysis with better error handling and progress tracking.
+    backend="graphql" fetches only the fields the pipeline uses and skips the parse pass.
+    Issues stream through concurrent classify, web search and suggest stages and
+    each enriched record is appended to data/{repo}_devrel.ndjson, in snapshot
+    order, as soon as it is done.
+    If an earlier run for the repo was interrupted, it resumes from its checkpoint.
+    Issues unchanged since the previous analysis (same updated_at or content hash)
+    reuse its results, so only new or edited issues hit the LLM and search.
+    force=True discards the checkpoint and previous results and recomputes everything.
+    batch_size sets how many issues share one classification prompt.
+    Issues whose GitHub labels map to a class (see label_aliases.json) are labeled
+    directly; the rest go to a local TF-IDF model trained on the repo's labeled
+    issues, and only those it scores below local_threshold reach the LLM.
+    combined=True asks the LLM for label and DevRel action in one generation.
+    cluster=True groups similar issues per label and generates one DevRel
+    suggestion per topic cluster instead of one per issue.
+    web_search="lazy" skips Tavily entirely; the dashboard fetches an issue's
+    web context the first time someone asks for it.
+    workers caps LLM requests in flight (default LLM_CONCURRENCY) and out_path
+    overrides where the enriched NDJSON is written.
+    progress receives status updates and the summary (see tools/progress.py): the
+    Streamlit pages pass a StreamlitProgress, the command line a LogProgress.
+    """
+    if "/" not in repo:
+        raise ValueError("Invalid repo format. Use 'owner/repo'.")
+
+    logger.info(f"Starting analysis for repository: {repo}")
+
+    progress = progress or Progress()
+    if workers:
+        # Must happen before the first LLM call creates the shared client
+        configure(concurrency=workers)
+
+    checkpoint = None
+    previous = None
+    searcher = None
+    pipeline = None
+    try:
+        # Step 1: Fetch issues from GitHub (streamed to NDJSON on disk)
+        logger.info("Fetching issues from GitHub...")
+        progress.update(10, "📡 Fetching issues from GitHub...")
+
+        os.makedirs("data", exist_ok=True)
+        if backend == "graphql":
+            total_issues = fetch_issues_graphql(repo)
+        else:
+            total_issues = fetch_issues(repo)
+        logger.info(f"Fetched {total_issues} issues")
+
+        if not total_issues:
+            raise ValueError("No issues found or GitHub API failed")
+
+        progress.update(20, "📝 Processing issues...")
+
+        # Step 2: Parse issues lazily (GraphQL results are already in parsed form)
+        if backend == "graphql":
+            source_path = parsed_path(repo)
+            open_issues = lambda: read_ndjson(source_path)
+        else:
+            source_path = snapshot_path(repo)
+            open_issues = lambda: iter_issues(source_path)
+        parsed = open_issues()
+
+        # Issues with unambiguous maintainer labels skip the classifiers entirely
+        label_mapper = LabelMapper(repo)
+
+        # Local classifier stage, trained on issues that already carry GitHub labels
+        try:
+            local_model = load_or_train(repo, open_issues(), label_mapper)
+        except Exception as e:
+            logger.error(f"Local classifier unavailable, using the LLM for every issue: {e}")
+            local_model = None
+
+        # Topic clusters share one DevRel suggestion between near-duplicate issues
+        clusters = None
+        if cluster:
             try:
-                suggestion = recommend_devrel_action(issue)
-                issue["devrel_action"] = suggestion
-                
-                if suggestion and suggestion != "No suggestion available":
-                    successful_devrel_suggestions += 1
-                    logger.info(f"DevRel suggestion for issue #{issue.get('number')}: {suggestion[:50]}...")
-                else:
-                    logger.warning(f"No DevRel suggestion for issue #{issue.get('number')}")
-                    
+                clusters = TopicClusters(open_issues())
             except Exception as e:
-                logger.error(f"DevRel suggestion failed for issue #{issue.get('number')}: {e}")
-                issue["devrel_action"] = "No suggestion available"
-            
-            enriched.append(issue)
-        
-        # Step 7: Save enriched data
-        if 'st' in globals():
-            status_text.text("💾 Saving results...")
-            progress_bar.progress(90)
-        
-        final_path = f"data/{repo.replace('/', '_')}_devrel.json"
-        with open(final_path, "w", encoding="utf-8") as f:
-            json.dump(enriched, f, indent=2)
-        
+                logger.error(f"Topic clustering unavailable, suggesting per issue: {e}")
+
+        logger.info(f"Processing {total_issues} parsed issues")
+
+        # Counters for tracking success/failure
+        stats = Counter(
+            successful_classifications=0,
+            successful_devrel_suggestions=0,
+            successful_web_searches=0,
+            reused_issues=0
+        )
+        label_counts = Counter()
+        label_sources = Counter()
+        processed = 0
+
+        # Resume an interrupted run unless a full recompute was asked for
+        final_path = out_path or devrel_path(repo)
+        checkpoint = Checkpoint(checkpoint_path(repo))
+        resume = checkpoint.exists() and os.path.exists(final_path) and not force
+
+        finished = set()
+        if resume:
+            for issue in read_ndjson(final_path):
+                finished.add(issue.get("number"))
+                if clusters:
+                    # Replaying in order rebuilds the same cluster ids as the interrupted run
+                    clusters.assign(issue)
+                    clusters.share(issue)
+                tally(issue, stats, label_counts, label_sources)
+                processed += 1
+            logger.info(f"Resuming {repo}: {processed} issues already finished")
+        saved = checkpoint.load(skip=finished) if resume else {}
+        checkpoint.open(resume)
+
+        # Delta mode: the previous output is kept aside and unchanged issues reuse it
+        prev_path = f"{final_path}.prev"
+        if force:
+            if os.path.exists(prev_path):
+                os.remove(prev_path)
+        elif not resume and os.path.exists(final_path):
+            os.replace(final_path, prev_path)
+        previous = PreviousResults(prev_path)
+        if len(previous):
+            logger.info(f"Delta mode: comparing against {len(previous)} previously analyzed issues")
+        finished_before = processed
+
+        # Steps 3-5 as a small dependency graph, each stage on its own thread:
+        #   classify (+ cluster) -> suggest, and classify -> web search -> join before writing.
+        # Web searches run on their own thread pool, so GitHub-fed classification,
+        # LLM suggestions and Tavily all make progress at the same time; bounded
+        # queues between stages keep a fast stage from running far ahead.
+        searcher = WebSearcher()
+        to_search = 0 if web_search == "lazy" else issues_to_search(open_issues(), finished, saved, previous)
+        policy = EnrichmentPolicy(to_search, deferred=web_search == "lazy")
+        pipeline = StagePipeline(resume_stage(parsed, finished, saved))
+        pipeline.add("classify", lambda issues: cluster_stage(
+            classify_stage(reuse_stage(issues, previous, stats),
+                           checkpoint, batch_size, local_model, local_threshold, label_mapper, combined,
+                           workers or LLM_CONCURRENCY),
+            clusters))
+        pipeline.add("search", lambda issues: search_submit_stage(issues, searcher, policy, checkpoint))
+        pipeline.add("suggest", lambda issues: suggest_stage(
+            issues, checkpoint, clusters, workers * 2 if workers else SUGGEST_CONCURRENCY))
+        pipeline.add("web_context", lambda issues: search_join_stage(issues, checkpoint, policy))
+
+        with open(final_path, "a" if resume else "w", encoding="utf-8") as out:
+            for i, issue in enumerate(pipeline):
+                logger.info(f"Finished issue #{issue.get('number', i)}: {issue.get('title', 'No title')[:50]}")
+
+                # Persist immediately so a crash keeps everything done so far
+                issue.pop("_stages", None)
+                append_ndjson(out, issue)
+                tally(issue, stats, label_counts, label_sources)
+                processed += 1
+
+                # Update progress
+                progress_pct = 20 + (processed / total_issues) * 70  # 20% to 90%
+                counts = pipeline.progress()
+                progress.update(
+                    min(90, int(progress_pct)),
+                    f"🤖 {processed}/{total_issues} written · 🏷️ {counts['classify']} classified · "
+                    f"💡 {counts['suggest']} suggested · 🌐 {searcher.completed} searched"
+                )
+
+        # Run finished: the next invocation starts a fresh analysis
+        checkpoint.clear()
+        searcher.close()
+        previous.close()
+        if os.path.exists(prev_path):
+            os.remove(prev_path)
+
+        total_issues = processed or 1
+
         # Final statistics
-        label_counts = Counter([i["predicted_label"] for i in enriched])
-        
         results = {
-            "total_issues": len(enriched),
+            "total_issues": processed,
             "labels": label_counts,
-            "successful_classifications": successful_classifications,
-            "successful_devrel_suggestions": successful_devrel_suggestions,
-            "successful_web_searches": successful_web_searches,
-            "classification_success_rate": (successful_classifications / total_issues) * 100,
-            "devrel_success_rate": (successful_devrel_suggestions / total_issues) * 100,
-            "web_search_success_rate": (successful_web_searches / total_issues) * 100
+            "successful_classifications": stats["successful_classifications"],
+            "successful_devrel_suggestions": stats["successful_devrel_suggestions"],
+            "successful_web_searches": stats["successful_web_searches"],
+            "classification_success_rate": (stats["successful_classifications"] / total_issues) * 100,
+            "devrel_success_rate": (stats["successful_devrel_suggestions"] / total_issues) * 100,
+            "web_search_success_rate": (stats["successful_web_searches"] / total_issues) * 100,
+            "label_sources": dict(label_sources),
+            "local_classification_rate": (label_sources["local"] / total_issues) * 100,
+            "reused_issues": stats["reused_issues"],
+            "reanalyzed_issues": processed - finished_before - stats["reused_issues"],
+            "github_quota": quota_stats(),
+            "classification_cache": classification_cache.stats(),
+            "search_cache": search_cache.stats(),
+            "web_search": searcher.stats(),
+            "web_enrichment": policy.stats(),
+            "stage_progress": dict(pipeline.progress(), searched=searcher.completed),
+            "llm_circuit": breaker.stats(),
+            "devrel_streaming": stream_stats.stats(),
+            "llm_endpoints": endpoint_stats(),
+            "llm_hedging": hedging.stats(),
+            "topic_clusters": clusters.stats() if clusters else None
         }
-        
+
         logger.info(f"Analysis complete for {repo}:")
         logger.info(f"  - Total issues: {results['total_issues']}")
         logger.info(f"  - Classification success: {results['classification_success_rate']:.1f}%")
         logger.info(f"  - DevRel suggestion success: {results['devrel_success_rate']:.1f}%")
         logger.info(f"  - Web search success: {results['web_search_success_rate']:.1f}%")
+        logger.info(f"  - Label sources: {results['label_sources']}")
+        logger.info(f"  - Classified locally: {results['local_classification_rate']:.1f}% (threshold {local_threshold})")
+        logger.info(f"  - Reused unchanged: {results['reused_issues']}, re-analyzed: {results['reanalyzed_issues']}")
         logger.info(f"  - Label distribution: {dict(label_counts)}")
-        
-        if 'st' in globals():
-            progress_bar.progress(100)
-            status_text.text("✅ Analysis complete!")
-            
-            # Show summary stats
-            st.info(f"""
-            **Analysis Summary:**
-            - Total issues processed: {results['total_issues']}
-            - Classification success rate: {results['classification_success_rate']:.1f}%
-            - DevRel suggestions generated: {results['devrel_success_rate']:.1f}%
-            - Web context added: {results['web_search_success_rate']:.1f}%
-            """)
-            
-            if results['classification_success_rate'] < 50:
-                st.warning("⚠️ Low classification success rate. Check your LLM endpoint!")
-            
-            if results['devrel_success_rate'] < 30:
-                st.warning("⚠️ Low DevRel suggestion rate. LLM might not be responding properly.")
-        
+        logger.info(f"  - GitHub quota: {results['github_quota']}")
+        logger.info(f"  - Classification cache: {results['classification_cache']}")
+        logger.info(f"  - Search cache: {results['search_cache']}")
+        logger.info(f"  - Web search pool: {results['web_search']}")
+        logger.info(f"  - Web enrichment policy: {results['web_enrichment']}")
+        logger.info(f"  - Stage progress: {results['stage_progress']}")
+        logger.info(f"  - LLM circuit breaker: {results['llm_circuit']}")
+        logger.info(f"  - DevRel streaming: {results['devrel_streaming']}")
+        logger.info(f"  - LLM hedging: {results['llm_hedging']}")
+        logger.info(f"  - Topic clusters: {results['topic_clusters']}")
+        if results['llm_endpoints']:
+            logger.info(f"  - LLM endpoints: {results['llm_endpoints']}")
+
+        progress.finish(results)
+
         return results
-        
+
     except Exception as e:
         logger.error(f"Repository analysis failed: {e}")
-        if 'st' in globals():
-            status_text.text("❌ Analysis failed!")
-            progress_bar.progress(0)
+        progress.fail(e)
         raise
 
+    finally:
+        # Also runs on KeyboardInterrupt and Streamlit's rerun/stop, which skip
+        # `except Exception`: no stage thread may outlive the run and keep writing
+        if pipeline:
+            pipeline.close()
+        if searcher:
+            searcher.close()
+        if previous:
+            previous.close()
+        if checkpoint:
+            # Keep the log on disk so the next invocation resumes from here
+            checkpoint.close()
+
 # Test function to verify everything is working
 def test_pipeline():
     """Test the pipeline with a small repo"""
@@ -213,5 +627,61 @@ def test_pipeline():
         print(f"Pipeline test failed: {e}")
         return False
 
+# ---------------------- Command line ----------------------
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m run_pipeline",
+        description="Analyze a GitHub repository's open issues without the Streamlit UI."
+    )
+    commands = parser.add_subparsers(dest="command")
+
+    analyze = commands.add_parser("analyze", help="fetch, classify and enrich one repository")
+    analyze.add_argument("repo", help="owner/repo")
+    analyze.add_argument("--workers", type=int, default=None,
+                         help=f"LLM requests in flight (default {LLM_CONCURRENCY})")
+    analyze.add_argument("--out", default=None, help="enriched NDJSON path (default data/<owner>_<repo>_devrel.ndjson)")
+    analyze.add_argument("--summary", default=None, help="also write the JSON summary to this file")
+    analyze.add_argument("--backend", choices=["rest", "graphql"], default="rest", help="GitHub fetch backend")
+    analyze.add_argument("--batch-size", type=int, default=CLASSIFY_BATCH_SIZE, help="issues per classification prompt")
+    analyze.add_argument("--web", choices=["eager", "lazy"], default=WEB_SEARCH_MODE, help="search the web now or on demand")
+    analyze.add_argument("--combined", action="store_true", default=COMBINED_AGENT,
+                         help="one LLM call for label and DevRel action")
+    analyze.add_argument("--no-cluster", dest="cluster", action="store_false", default=CLUSTER_ISSUES,
+                         help="generate a DevRel action for every issue")
+    analyze.add_argument("--force", action="store_true", help="ignore checkpoints and previous results")
+
+    commands.add_parser("test", help="run the pipeline against octocat/Hello-World")
+    return parser
+
+def main(argv=None):
+    """
+    Headless entry point for servers, cron and batch workers. Logs and progress
+    go to stderr; stdout gets exactly one JSON document, the run summary, or
+    {"error": ...} with exit code 1.
+    """
+    args = build_parser().parse_args(argv)
+    if args.command != "analyze":
+        return 0 if test_pipeline() else 1
+
+    try:
+        # The tools print as they go; keep stdout for the machine-readable summary
+        with contextlib.redirect_stdout(sys.stderr):
+            results = analyze_repository(
+                args.repo, backend=args.backend, force=args.force, batch_size=args.batch_size,
+                combined=args.combined, cluster=args.cluster, web_search=args.web,
+                workers=args.workers, out_path=args.out, progress=LogProgress()
+            )
+    except Exception as e:
+        print(json.dumps({"repo": args.repo, "error": str(e)}))
+        return 1
+
+    summary = json.dumps(dict(results, repo=args.repo, output=args.out or devrel_path(args.repo)), default=str)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            f.write(summary + "\n")
+    print(summary)
+    return 0
+
 if __name__ == "__main__":
-    test_pipeline()
\ No newline at end of file
+    sys.exit(main())
@@ -1,6 +1,8 @@
 import requests
 import json
 import time
+import sys
+import asyncio
 
 # Your HuggingFace endpoint
 OLLAMA_API_URL = "https://aditya69690-100-hack.hf.space/api/chat"
@@ -179,7 +181,39 @@ def test_different_urls():
         except Exception as e:
             print(f"❌ Connection failed: {e}")
 
-if __name__ == "__main__":
+def benchmark_backends(names, model="tinyllama", rounds=5):
+    """Time the same classification prompt against each LLM backend (see agents/llm_backends.py)"""
+    from agents.llm_backends import make_backend
+    from agents.classifier_agent import build_prompt, CLASSIFY_OPTIONS
+
+    print("\n" + "=" * 50)
+    print("BENCHMARKING LLM BACKENDS")
+    print("=" * 50)
+
+    prompt = build_prompt("Login button not working, getting error 500 after the last upgrade")
+
+    async def bench(name):
+        backend = make_backend(name)
+        latencies = []
+        try:
+            for _ in range(rounds):
+                started = time.perf_counter()
+                answer = await backend.generate(prompt, model, CLASSIFY_OPTIONS, 60)
+                latencies.append(time.perf_counter() - started)
+            print(f"✅ {name}: avg {sum(latencies) / len(latencies):.2f}s, "
+                  f"max {max(latencies):.2f}s over {rounds} calls (last answer: {answer.strip()!r})")
+        except Exception as e:
+            print(f"❌ {name} failed: {e}")
+        finally:
+            await backend.aclose()
+
+    for name in names:
+        asyncio.run(bench(name))
+
+if __name__ == "__main__" and sys.argv[1:2] == ["--benchmark"]:
+    # python test.py --benchmark mock ollama_http ollama_local openai
+    benchmark_backends(sys.argv[2:] or ["mock", "ollama_http"])
+elif __name__ == "__main__":
     print("🧪 DEBUGGING HUGGINGFACE LLM ENDPOINT")
     print("This script will help identify the correct API format for your endpoint")
     
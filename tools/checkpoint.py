@@ -0,0 +1,64 @@
+import os
+import threading
+from tools.ndjson import read_ndjson, append_ndjson
+
+# Stages in pipeline order, with the issue fields each one produces
+STAGES = {
+    "classified": ("predicted_label", "label_source"),
+    "searched": ("web_snippets", "web_context", "web_skipped"),
+    "suggested": ("devrel_action", "devrel_source"),
+}
+
+
+class Checkpoint:
+    """
+    Per-issue, per-stage progress log for one analysis run.
+    Every finished stage appends one NDJSON line with the fields it produced,
+    so an interrupted run can pick up at the first unfinished issue and stage.
+    The file only exists while a run is in progress.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        # Pipeline stages run on separate threads and all record here
+        self._lock = threading.Lock()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self, skip=()):
+        """Map issue number -> {"stages": set, "fields": dict}, ignoring numbers in skip."""
+        progress = {}
+        if not self.exists():
+            return progress
+        for record in read_ndjson(self.path):
+            if record["number"] in skip:
+                continue
+            entry = progress.setdefault(record["number"], {"stages": set(), "fields": {}})
+            entry["stages"].add(record["stage"])
+            entry["fields"].update(record["fields"])
+        return progress
+
+    def open(self, resume):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+
+    def record(self, issue, stage):
+        fields = {key: issue.get(key) for key in STAGES[stage]}
+        with self._lock:
+            if self._file is None:
+                # Closed: the run was abandoned and a stage thread is still winding down
+                return
+            append_ndjson(self._file, {"number": issue.get("number"), "stage": stage, "fields": fields})
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def clear(self):
+        """Drop the log once the run has completed."""
+        self.close()
+        if self.exists():
+            os.remove(self.path)
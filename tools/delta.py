@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+from tools.checkpoint import STAGES
+
+
+# Sources the agents report when the LLM call failed and a stand-in was used
+FALLBACK_SOURCES = {"keyword_fallback", "fallback", "error"}
+
+
+def succeeded(stage, record):
+    """
+    True if a previous result for stage is final. Failures (an "unknown" label,
+    keyword fallback labels, template suggestions) and skipped or empty
+    searches, which is also what a failed Tavily call leaves behind, are worth
+    another try.
+    """
+    if stage == "classified":
+        return (record.get("predicted_label", "unknown") != "unknown"
+                and record.get("label_source") not in FALLBACK_SOURCES)
+    if stage == "searched":
+        return bool(record.get("web_snippets")) and not record.get("web_skipped")
+    if stage == "suggested":
+        return (record.get("devrel_action") not in (None, "", "No suggestion available")
+                and record.get("devrel_source") not in FALLBACK_SOURCES)
+    return False
+
+
+def content_hash(issue):
+    """Hash of everything the enrichment stages look at: title, body and labels."""
+    payload = json.dumps([issue.get("title", ""), issue.get("body", ""), sorted(issue.get("labels", []))])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PreviousResults:
+    """
+    Index of a previous devrel NDJSON output: issue number -> (updated_at, hash, offset).
+    Only the index is kept in memory; a record's fields are read back from disk
+    when an unchanged issue needs them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index = {}
+        self._file = None
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            offset = 0
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    self.index[record["number"]] = (record.get("updated_at"), content_hash(record), offset)
+                except (json.JSONDecodeError, KeyError):
+                    pass  # Torn line from an interrupted write
+                offset += len(line)
+        self._file = open(path, "rb")
+
+    def __len__(self):
+        return len(self.index)
+
+    def lookup(self, issue):
+        """
+        If the issue is unchanged, return {stage: fields} for the stages the previous
+        run completed successfully, else None. Search and suggestion both depend on
+        the label, so nothing is reused when classification failed.
+        """
+        entry = self.index.get(issue.get("number"))
+        if not entry:
+            return None
+        updated_at, digest, offset = entry
+        same_timestamp = updated_at not in (None, "N/A") and updated_at == issue.get("updated_at")
+        if not same_timestamp and digest != content_hash(issue):
+            return None
+        self._file.seek(offset)
+        record = json.loads(self._file.readline())
+        if not succeeded("classified", record):
+            return None
+        return {
+            stage: {key: record[key] for key in fields if key in record}
+            for stage, fields in STAGES.items() if succeeded(stage, record)
+        }
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,135 @@
+import os
+import bisect
+import threading
+from datetime import datetime, timezone
+from collections import Counter
+
+# Run budget for paid web searches (0 = unlimited); cache hits are free
+TAVILY_MAX_SEARCHES = int(os.getenv("TAVILY_MAX_SEARCHES", 0))
+TAVILY_MAX_SECONDS = float(os.getenv("TAVILY_MAX_SECONDS", 0))
+# Issues scoring below this are never searched; above the second, searches go deep
+TAVILY_MIN_SCORE = float(os.getenv("TAVILY_MIN_SCORE", 0.0))
+TAVILY_ADVANCED_SCORE = float(os.getenv("TAVILY_ADVANCED_SCORE", 0.6))
+
+# How much outside context helps a DevRel answer for each kind of issue
+LABEL_VALUE = {
+    "question": 1.0,
+    "bug": 0.9,
+    "documentation": 0.6,
+    "feature": 0.4,
+    "discussion": 0.2,
+    "unknown": 0.3,
+}
+
+
+def issue_age_days(issue):
+    stamp = issue.get("updated_at") or issue.get("created_at")
+    if not stamp:
+        return None
+    try:
+        updated = datetime.fromisoformat(stamp.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return (datetime.now(timezone.utc) - updated).days
+
+
+def value_score(issue):
+    """0..1: label value, recency (fresh issues matter most) and how much text there is to search with."""
+    label = LABEL_VALUE.get(issue.get("predicted_label", "unknown"), 0.3)
+    age = issue_age_days(issue)
+    recency = 0.5 if age is None else max(0.0, 1 - max(age - 30, 0) / 335)
+    length = min(len(issue.get("title", "")) + len(issue.get("body", "")), 1500) / 1500
+    return round(0.5 * label + 0.3 * recency + 0.2 * length, 3)
+
+
+class EnrichmentPolicy:
+    """
+    Decides per issue whether to search and how deep. Issues stream past once,
+    so "highest value first" is enforced with an adaptive threshold: with B
+    searches left for R remaining issues, an issue is searched only if its score
+    is in the top B/R of the scores seen so far. Searches answered from the
+    cache cost nothing and are always allowed. With deferred=True nothing is
+    searched during the run.
+    """
+
+    def __init__(self, total_issues, max_searches=TAVILY_MAX_SEARCHES, max_seconds=TAVILY_MAX_SECONDS,
+                 min_score=TAVILY_MIN_SCORE, advanced_score=TAVILY_ADVANCED_SCORE, deferred=False):
+        self.deferred = deferred
+        self.remaining = total_issues
+        self.max_searches = max_searches
+        self.max_seconds = max_seconds
+        self.min_score = min_score
+        self.advanced_score = advanced_score
+        self.scores = []
+        self.searches = 0
+        self.depths = Counter()
+        self.skipped = Counter()
+        # decide() runs on the search stage's thread, refund() on the web_context stage's
+        self._lock = threading.Lock()
+
+    def threshold(self):
+        if not self.max_searches:
+            return self.min_score
+        left = self.max_searches - self.searches
+        if left <= 0:
+            return None
+        share = left / max(self.remaining, 1)
+        if share >= 1:
+            return self.min_score
+        if len(self.scores) < 20:
+            # Too few scores seen yet; assume they are spread evenly over 0..1
+            return max(self.min_score, 1 - share)
+        return max(self.min_score, self.scores[int(len(self.scores) * (1 - share))])
+
+    def decide(self, issue, cached, seconds_spent=0.0):
+        """Return (depth, None) to search or (None, reason) to skip."""
+        with self._lock:
+            return self._decide(issue, cached, seconds_spent)
+
+    def _decide(self, issue, cached, seconds_spent):
+        if self.deferred:
+            # Searched later, on demand, from the dashboard
+            self.skipped["deferred"] += 1
+            return None, "deferred"
+        score = value_score(issue)
+        issue["web_value"] = score
+        threshold = self.threshold()
+        bisect.insort(self.scores, score)
+        self.remaining -= 1
+
+        depth = "advanced" if score >= self.advanced_score else "basic"
+        if cached(depth):
+            self.depths[f"{depth}_cached"] += 1
+            return depth, None
+        if self.max_seconds and seconds_spent >= self.max_seconds:
+            reason = "time_budget"
+        elif threshold is None:
+            reason = "search_budget"
+        elif score < threshold:
+            reason = "low_value"
+        else:
+            self.searches += 1
+            self.depths[depth] += 1
+            return depth, None
+        self.skipped[reason] += 1
+        return None, reason
+
+    def refund(self, reason, searched=True):
+        """
+        An issue's search never ran (e.g. the time budget ran out first): count it
+        as skipped, and give the search back unless another issue already did
+        (searched=False, for issues that shared one in-flight search).
+        """
+        with self._lock:
+            if searched:
+                self.searches -= 1
+            self.skipped[reason] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "searches": self.searches,
+                "depths": dict(self.depths),
+                "skipped": dict(self.skipped),
+                "skipped_total": sum(self.skipped.values()),
+            }
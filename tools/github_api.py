@@ -1,45 +1,298 @@
-import requests
 import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
 from dotenv import load_dotenv
-import streamlit as st
+try:
+    import streamlit as st
+except ImportError:  # headless runs (python -m run_pipeline) don't need the UI
+    st = None
+from tools.github_scheduler import GitHubScheduler
+from tools.ndjson import read_ndjson, append_ndjson
 
 # Load local .env for local dev only
 load_dotenv()
 
+def streamlit_secret(name):
+    if st is None:
+        return None
+    try:
+        return st.secrets.get(name)
+    except Exception:
+        # No secrets.toml, e.g. when run from the command line
+        return None
+
 # Try Streamlit Cloud secrets first
-GITHUB_TOKEN = st.secrets.get("GITHUB_TOKEN", os.getenv("GITHUB_TOKEN"))
+GITHUB_TOKEN = streamlit_secret("GITHUB_TOKEN") or os.getenv("GITHUB_TOKEN")
 
 if not GITHUB_TOKEN:
     raise EnvironmentError("❌ GITHUB_TOKEN is missing. Please set it in .env (locally) or secrets.toml (Streamlit Cloud).")
 
 HEADERS = {"Authorization": f"token {GITHUB_TOKEN}"}
 
-def fetch_issues(repo):
-    all_issues = []
-    page = 1
+# Shared across every analysis in this process so concurrent runs see the same quota.
+# REST and GraphQL are metered separately by GitHub, so each gets its own scheduler.
+scheduler = GitHubScheduler(HEADERS)
+graphql_scheduler = GitHubScheduler(HEADERS, pool_size=4)
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+
+# Only the fields the pipeline reads; the issues connection never includes PRs
+ISSUES_QUERY = """
+query($owner: String!, $name: String!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    issues(first: 100, after: $cursor, states: OPEN, orderBy: {field: CREATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        number
+        title
+        body
+        url
+        createdAt
+        updatedAt
+        labels(first: 20) { nodes { name } }
+      }
+    }
+  }
+}
+"""
+
+DATA_DIR = "data"
+
+def snapshot_path(repo):
+    return f"{DATA_DIR}/{repo.replace('/', '_')}_issues.ndjson"
+
+def parsed_path(repo):
+    return f"{DATA_DIR}/{repo.replace('/', '_')}_parsed.ndjson"
+
+def sync_state_path(repo):
+    return f"{DATA_DIR}/{repo.replace('/', '_')}_sync.json"
+
+def load_sync_state(repo):
+    try:
+        with open(sync_state_path(repo), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"since": None, "etags": {}}
+
+def save_sync_state(repo, state):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    with open(sync_state_path(repo), "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+def merge_snapshot(snapshot, changed, out):
+    """
+    Stream the old snapshot into `out`, replacing changed issues and dropping ones
+    closed since the last sync. Both sides are ordered newest first (the issues
+    endpoint default), so only the changed set is held in memory.
+    """
+    pending = sorted(
+        (issue for issue in changed.values() if issue.get("state", "open") == "open"),
+        key=lambda issue: issue["number"], reverse=True
+    )
+    count = 0
+    k = 0
+    for issue in snapshot:
+        if issue["number"] in changed:
+            continue
+        while k < len(pending) and pending[k]["number"] > issue["number"]:
+            append_ndjson(out, pending[k], flush=False)
+            k += 1
+            count += 1
+        append_ndjson(out, issue, flush=False)
+        count += 1
+    for issue in pending[k:]:
+        append_ndjson(out, issue, flush=False)
+        count += 1
+    return count
+
+def page_url(repo, page, per_page, since=None):
+    url = f"https://api.github.com/repos/{repo}/issues?page={page}&per_page={per_page}"
+    if since:
+        # Closed issues are needed too, so they can be dropped from the snapshot
+        url += f"&state=all&since={since}"
+    return url
+
+def last_page_number(response):
+    """Read the rel="last" page number from the Link header, if there is one."""
+    last_url = response.links.get("last", {}).get("url")
+    if not last_url:
+        return None
+    pages = parse_qs(urlparse(last_url).query).get("page")
+    return int(pages[0]) if pages else None
+
+def etag_key(page, since=None):
+    """
+    Where a page's ETag is stored: page number and request shape, but not the
+    cursor, which moves whenever anything changes and would orphan every ETag.
+    A 304 still means the body is identical to the one already merged.
+    """
+    return f"{'updated' if since else 'open'}:{page}"
+
+def fetch_page(url, cached=None):
+    """GET one page of issues, sending If-None-Match when an ETag is cached for it."""
+    headers = {"If-None-Match": cached["etag"]} if cached else {}
+    return scheduler.get(url, headers=headers)
+
+def quota_stats():
+    return {"rest": scheduler.stats(), "graphql": graphql_scheduler.stats()}
+
+def fetch_issues(repo, incremental=True, parallel=True, max_workers=8):
+    """
+    Fetch open issues for a repo into the NDJSON snapshot data/{repo}_issues.ndjson
+    and return how many it holds. Pages are written out as they arrive.
+    With incremental=True only issues updated since the last sync are requested,
+    and each page is sent with If-None-Match so unchanged pages come back as 304s.
+    In practice that saves the "nothing changed since last sync" probes: any
+    update changes the changed-issue pages, and a full sync sends no ETags.
+    With parallel=True the remaining pages are fetched concurrently once the first
+    page's Link header says how many there are; results keep page order.
+    If any page fails, the snapshot and sync cursor are left as they were.
+    """
+    state = load_sync_state(repo) if incremental else {"since": None, "etags": {}}
+    # Without a snapshot to merge into, a cursor is useless: do a full sync
+    since = state["since"] if os.path.exists(snapshot_path(repo)) else None
+    # A 304 means "already in the snapshot", which only holds when merging into one
+    known = state["etags"] if since else {}
+
     per_page = 100
+    changed = {}
+    etags = {}
+    progress = {"cursor": since, "count": 0}
 
-    while True:
-        url = f"https://api.github.com/repos/{repo}/issues?page={page}&per_page={per_page}"
-        response = requests.get(url, headers=HEADERS)
+    os.makedirs(DATA_DIR, exist_ok=True)
+    tmp_path = f"{snapshot_path(repo)}.tmp"
+    out = open(tmp_path, "w", encoding="utf-8")
 
+    def handle(page, response):
+        """Record one page; returns (ok, page_was_full)."""
+        key = etag_key(page, since)
+        cached = known.get(key)
+        if response.status_code == 304:
+            # Page unchanged since last sync, its issues are already in the snapshot
+            etags[key] = cached
+            return True, cached["count"] >= per_page
+        if response.status_code in (403, 429):
+            # Still rate limited after the scheduler's retries: fail loudly, not with a partial list
+            raise RuntimeError(f"❌ GitHub rate limit hit while fetching {repo}: {response.text}")
         if response.status_code != 200:
             print(f"❌ GitHub API Error {response.status_code}: {response.text}")
-            break
-
+            return False, False
         batch = response.json()
+        if response.headers.get("ETag"):
+            etags[key] = {"etag": response.headers["ETag"], "count": len(batch)}
+        for issue in batch:
+            if issue.get("updated_at") and (progress["cursor"] is None or issue["updated_at"] > progress["cursor"]):
+                progress["cursor"] = issue["updated_at"]
+            # ❗ Filter out pull requests (they have a 'pull_request' key)
+            if "pull_request" in issue:
+                continue
+            if since:
+                changed[issue["number"]] = issue
+            else:
+                append_ndjson(out, issue, flush=False)
+                progress["count"] += 1
+        return True, len(batch) >= per_page
+
+    def get(page):
+        return fetch_page(page_url(repo, page, per_page, since), known.get(etag_key(page, since)))
+
+    try:
+        page = 1
+        response = get(page)
+        complete, more = handle(page, response)
+        last_page = last_page_number(response) if parallel and response.status_code == 200 else None
+
+        if complete and more and last_page:
+            pages = range(2, last_page + 1)
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                responses = pool.map(get, pages)
+                # Handle in page order so the result matches the sequential walk
+                for page, response in zip(pages, responses):
+                    ok, _ = handle(page, response)
+                    if not ok:
+                        complete = False
+                        break
+        else:
+            while complete and more:
+                page += 1
+                complete, more = handle(page, get(page))
+
+        if since:
+            progress["count"] = merge_snapshot(read_ndjson(snapshot_path(repo)), changed, out)
+    finally:
+        out.close()
+
+    if not complete:
+        # Keep the old snapshot and cursor so the next run retries the missing pages
+        os.remove(tmp_path)
+        raise RuntimeError(f"❌ Incomplete fetch for {repo}; snapshot left unchanged")
+
+    os.replace(tmp_path, snapshot_path(repo))
+    save_sync_state(repo, {"since": progress["cursor"], "etags": etags})
+
+    changed_count = len(changed) if since else progress["count"]
+    print(f"✅ Fetched {changed_count} changed issues from {repo} ({progress['count']} open in snapshot)")
+    return progress["count"]
+
+def fetch_issues_graphql(repo):
+    """
+    Fetch open issues through the GraphQL API, requesting only the fields the
+    pipeline uses. Records have the same structure as github_parser.iter_issues
+    and are streamed to data/{repo}_parsed.ndjson, so no separate parse pass is
+    needed. Returns the number of issues written. Any error, including GraphQL's
+    RATE_LIMITED (sent with a 200), raises and leaves the parsed file as it was.
+    """
+    owner, name = repo.split("/", 1)
+    count = 0
+    cursor = None
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    tmp_path = f"{parsed_path(repo)}.tmp"
+    out = open(tmp_path, "w", encoding="utf-8")
+    try:
+        while True:
+            payload = {"query": ISSUES_QUERY, "variables": {"owner": owner, "name": name, "cursor": cursor}}
+            response = graphql_scheduler.post(GRAPHQL_URL, json=payload)
+
+            if response.status_code in (403, 429):
+                raise RuntimeError(f"❌ GitHub rate limit hit while fetching {repo}: {response.text}")
+            if response.status_code != 200:
+                raise RuntimeError(f"❌ GitHub GraphQL Error {response.status_code} for {repo}: {response.text}")
+
+            data = response.json()
+            if data.get("errors"):
+                if any(error.get("type") == "RATE_LIMITED" for error in data["errors"]):
+                    raise RuntimeError(f"❌ GitHub rate limit hit while fetching {repo}: {data['errors']}")
+                raise RuntimeError(f"❌ GitHub GraphQL Error for {repo}: {data['errors']}")
 
-        # ❗ Filter out pull requests (they have a 'pull_request' key)
-        issues_only = [issue for issue in batch if "pull_request" not in issue]
+            connection = ((data.get("data") or {}).get("repository") or {}).get("issues")
+            if not connection:
+                raise RuntimeError(f"❌ GitHub GraphQL returned no issues connection for {repo}")
 
-        if not issues_only:
-            break
+            for node in connection["nodes"]:
+                append_ndjson(out, {
+                    "title": node.get("title") or "",
+                    "body": node.get("body") or "",
+                    "labels": [label["name"] for label in (node.get("labels") or {}).get("nodes", [])],
+                    "number": node.get("number", "N/A"),
+                    "created_at": node.get("createdAt", "N/A"),
+                    "updated_at": node.get("updatedAt", "N/A"),
+                    "html_url": node.get("url", "")
+                }, flush=False)
+                count += 1
 
-        all_issues.extend(issues_only)
-        if len(batch) < per_page:
-            break  # End of pagination
+            if not connection["pageInfo"]["hasNextPage"]:
+                break
+            cursor = connection["pageInfo"]["endCursor"]
+    except BaseException:
+        # Never swap a partial list in for the last complete one
+        out.close()
+        os.remove(tmp_path)
+        raise
+    out.close()
 
-        page += 1
+    os.replace(tmp_path, parsed_path(repo))
 
-    print(f"✅ Fetched {len(all_issues)} issues from {repo}")
-    return all_issues
+    print(f"✅ Fetched {count} issues from {repo} via GraphQL")
+    return count
@@ -1,4 +1,25 @@
 import json
+from tools.ndjson import read_ndjson
+
+def parse_issue(issue):
+    return {
+        "title": issue.get("title") or "",
+        "body": issue.get("body") or "",
+        "labels": [label.get("name", "") for label in issue.get("labels") or []],
+        "number": issue.get("number", "N/A"),
+        "created_at": issue.get("created_at", "N/A"),
+        "updated_at": issue.get("updated_at", "N/A"),
+        "html_url": issue.get("html_url", "")
+    }
+
+def iter_issues(file_path):
+    """Stream parsed issues from an NDJSON snapshot, one at a time."""
+    for issue in read_ndjson(file_path):
+        try:
+            yield parse_issue(issue)
+        except Exception as e:
+            print(f"[!] Failed to parse issue #{issue.get('number', 'unknown')}: {e}")
+            continue  # Skip this issue safely
 
 def load_issues(file_path):
     with open(file_path, "r", encoding="utf-8") as f:
@@ -7,13 +28,7 @@ def load_issues(file_path):
     issues = []
     for issue in data:
         try:
-            issues.append({
-                "title": issue.get("title") or "",
-                "body": issue.get("body") or "",
-                "labels": [label.get("name", "") for label in issue.get("labels") or []],
-                "number": issue.get("number", "N/A"),
-                "created_at": issue.get("created_at", "N/A")
-            })
+            issues.append(parse_issue(issue))
         except Exception as e:
             print(f"[!] Failed to parse issue #{issue.get('number', 'unknown')}: {e}")
             continue  # Skip this issue safely
@@ -0,0 +1,126 @@
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class GitHubScheduler:
+    """
+    Shared GitHub request scheduler.
+    Owns one pooled keep-alive session, tracks the remaining quota from the
+    X-RateLimit-* headers, paces requests before the quota runs out and
+    retries rate-limited responses (Retry-After / secondary limits) with backoff.
+    """
+
+    def __init__(self, headers, pool_size=16, reserve=50, max_retries=5, max_wait=900):
+        self.headers = headers
+        self.reserve = reserve          # requests kept back before we start deferring
+        self.max_retries = max_retries
+        self.max_wait = max_wait        # longest single sleep before giving up (seconds)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None
+        self.requests_sent = 0
+        self.retries = 0
+        self.throttled_seconds = 0.0
+
+    def _update_quota(self, response):
+        h = response.headers
+        with self._lock:
+            if "X-RateLimit-Limit" in h:
+                self.limit = int(h["X-RateLimit-Limit"])
+            if "X-RateLimit-Remaining" in h:
+                self.remaining = int(h["X-RateLimit-Remaining"])
+            if "X-RateLimit-Reset" in h:
+                self.reset_at = int(h["X-RateLimit-Reset"])
+
+    def _pace_delay(self):
+        """Seconds to wait before the next request so the quota lasts until the reset."""
+        with self._lock:
+            if self.remaining is None or self.reset_at is None:
+                return 0
+            until_reset = max(0, self.reset_at - time.time())
+            if self.remaining <= 0:
+                return until_reset + 1
+            if self.remaining > self.reserve:
+                # Reserve the request up front so concurrent callers see it
+                self.remaining -= 1
+                return 0
+            # Inside the reserve: spread what is left over the rest of the window
+            delay = until_reset / self.remaining
+            self.remaining -= 1
+            return delay
+
+    def _sleep(self, seconds):
+        if seconds <= 0:
+            return
+        if seconds > self.max_wait:
+            raise RuntimeError(f"❌ GitHub rate limit exhausted, next reset in {int(seconds)}s")
+        print(f"⏳ GitHub rate limit: waiting {seconds:.1f}s")
+        with self._lock:
+            self.throttled_seconds += seconds
+        time.sleep(seconds)
+
+    def _retry_delay(self, response, attempt):
+        """Backoff for a rate-limited response, or None if it was not rate limited."""
+        if response.status_code not in (403, 429):
+            return None
+        if "Retry-After" in response.headers:
+            return int(response.headers["Retry-After"])
+        if response.headers.get("X-RateLimit-Remaining") == "0" and self.reset_at:
+            return max(0, self.reset_at - time.time()) + 1
+        if "rate limit" in response.text.lower():
+            # Secondary limit without Retry-After: GitHub asks for at least a minute
+            return 60 * (2 ** attempt)
+        return None
+
+    def request(self, method, url, headers=None, timeout=30, **kwargs):
+        merged = dict(self.headers)
+        merged.update(headers or {})
+
+        for attempt in range(self.max_retries + 1):
+            self._sleep(self._pace_delay())
+            response = self.session.request(method, url, headers=merged, timeout=timeout, **kwargs)
+            with self._lock:
+                self.requests_sent += 1
+            self._update_quota(response)
+
+            delay = self._retry_delay(response, attempt)
+            if delay is None or attempt == self.max_retries:
+                return response
+
+            with self._lock:
+                self.retries += 1
+            self._sleep(delay)
+
+        return response
+
+    def get(self, url, headers=None, timeout=30):
+        return self.request("GET", url, headers=headers, timeout=timeout)
+
+    def post(self, url, json=None, headers=None, timeout=30):
+        return self.request("POST", url, headers=headers, timeout=timeout, json=json)
+
+    def stats(self):
+        """Quota snapshot so callers can plan multi-repo work."""
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "remaining": self.remaining,
+                "reset_at": self.reset_at,
+                "seconds_to_reset": max(0, int(self.reset_at - time.time())) if self.reset_at else None,
+                "requests_sent": self.requests_sent,
+                "retries": self.retries,
+                "throttled_seconds": round(self.throttled_seconds, 1),
+            }
+
+    def can_afford(self, n_requests):
+        """True if n_requests fit in the current window without dipping into the reserve."""
+        with self._lock:
+            return self.remaining is None or self.remaining - n_requests >= self.reserve
@@ -0,0 +1,64 @@
+import os
+import json
+import re
+
+# Per-repo alias tables, e.g. {"kubernetes/kubernetes": {"kind/support": "question"}}
+LABEL_ALIASES_PATH = os.getenv("LABEL_ALIASES_PATH", "label_aliases.json")
+
+PREDICTED_LABELS = {"bug", "feature", "question", "documentation", "discussion"}
+
+# Maintainer labels that already answer the classification question
+DEFAULT_ALIASES = {
+    "bug": "bug",
+    "defect": "bug",
+    "regression": "bug",
+    "crash": "bug",
+    "enhancement": "feature",
+    "feature": "feature",
+    "feature request": "feature",
+    "new feature": "feature",
+    "improvement": "feature",
+    "question": "question",
+    "support": "question",
+    "usage": "question",
+    "documentation": "documentation",
+    "docs": "documentation",
+    "doc": "documentation",
+    "discussion": "discussion",
+    "proposal": "discussion",
+    "rfc": "discussion",
+}
+
+# Namespaces people put in front of the type: "type: bug", "kind/feature", "t-docs", "🐛 bug"
+PREFIX = re.compile(r"^(?:type|kind|category|issue|t|k)\s*[:/\-]\s*|^[^\w]+\s*")
+
+
+def load_alias_tables(path=LABEL_ALIASES_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+class LabelMapper:
+    """Assigns predicted_label straight from GitHub labels when they are unambiguous."""
+
+    def __init__(self, repo=None, tables=None):
+        tables = load_alias_tables() if tables is None else tables
+        self.aliases = dict(DEFAULT_ALIASES)
+        for scope in ("default", repo):
+            for alias, label in (tables.get(scope) or {}).items():
+                if label in PREDICTED_LABELS:
+                    self.aliases[alias.strip().lower()] = label
+
+    def map_label(self, name):
+        name = name.strip().lower()
+        if name in self.aliases:
+            return self.aliases[name]
+        return self.aliases.get(PREFIX.sub("", name).strip())
+
+    def map_labels(self, labels):
+        """The single class the labels point to, or None if unlabeled or ambiguous."""
+        mapped = {self.map_label(name) for name in labels} - {None}
+        return mapped.pop() if len(mapped) == 1 else None
@@ -0,0 +1,34 @@
+import json
+import os
+
+# One JSON record per line, so files can be streamed and appended to without
+# ever holding the whole dataset in memory.
+
+def read_ndjson(path):
+    """Yield records one at a time; a torn last line from a crash is skipped."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"[!] Skipping malformed line in {path}")
+
+def append_ndjson(f, record, flush=True):
+    """Append one record to an open file, flushing by default so it survives a crash."""
+    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+    if flush:
+        f.flush()
+
+def write_ndjson(path, records):
+    """Write records atomically: to a temp file first, then rename over the target."""
+    tmp_path = f"{path}.tmp"
+    count = 0
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            count += 1
+    os.replace(tmp_path, path)
+    return count
@@ -0,0 +1,40 @@
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Progress:
+    """
+    What analyze_repository reports while it runs. The base class ignores
+    everything; front ends override the calls they care about.
+    """
+
+    def update(self, percent, message):
+        """percent is 0-100 over the whole run; message is a one-line status."""
+
+    def finish(self, results):
+        """Called once with the run summary."""
+
+    def fail(self, error):
+        """Called once if the run raises."""
+
+
+class LogProgress(Progress):
+    """Progress as log lines (for the CLI, cron and workers), at most one every `interval` seconds."""
+
+    def __init__(self, interval=5.0):
+        self.interval = interval
+        self._last = 0.0
+
+    def update(self, percent, message):
+        now = time.monotonic()
+        if percent >= 100 or now - self._last >= self.interval:
+            self._last = now
+            logger.info(f"[{percent:3d}%] {message}")
+
+    def finish(self, results):
+        logger.info(f"[100%] Analysis complete: {results['total_issues']} issues")
+
+    def fail(self, error):
+        logger.error(f"Analysis failed: {error}")
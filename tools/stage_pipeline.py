@@ -0,0 +1,120 @@
+import os
+import time
+import queue
+import threading
+import logging
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Issues allowed to wait between two stages before the faster one is paused
+STAGE_QUEUE_SIZE = int(os.getenv("STAGE_QUEUE_SIZE", 64))
+
+_DONE = object()
+
+
+class PipelineClosed(Exception):
+    """Raised inside stages reading from a closed pipeline, so they unwind instead of finishing their input."""
+
+
+class _Failure:
+    def __init__(self, error):
+        self.error = error
+
+
+class StagePipeline:
+    """
+    Runs a chain of generator stages concurrently. Each stage (a function taking
+    an iterator of issues and yielding them, in order) gets its own thread, and
+    neighbouring stages are joined by a bounded queue: a stage that runs ahead
+    blocks once queue_size issues are waiting downstream. An exception in any
+    stage is passed down the chain and raised to whoever iterates the pipeline.
+
+        pipeline = StagePipeline(issues)
+        pipeline.add("classify", lambda items: classify_stage(items, ...))
+        pipeline.add("suggest", lambda items: suggest_stage(items, ...))
+        for issue in pipeline: ...
+    """
+
+    def __init__(self, source, queue_size=STAGE_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.counts = Counter()  # issues each stage has handed on
+        self.stages = []
+        self._output = iter(source)
+        self._threads = []
+        self._stop = threading.Event()
+        self._started = False
+
+    def add(self, name, stage):
+        out = queue.Queue(maxsize=self.queue_size)
+        thread = threading.Thread(
+            target=self._run, args=(name, stage, self._output, out), name=f"stage-{name}", daemon=True
+        )
+        self.stages.append(name)
+        self._threads.append(thread)
+        self._output = self._drain(out)
+        return self
+
+    def __iter__(self):
+        if not self._started:
+            self._started = True
+            for thread in self._threads:
+                thread.start()
+        return self._output
+
+    def progress(self):
+        """Issues through each stage so far, in stage order."""
+        return {name: self.counts[name] for name in self.stages}
+
+    def close(self, timeout=2.0):
+        """
+        Stop every stage thread (used when the consumer gives up early) and wait
+        up to timeout seconds for them; a stage stuck in an LLM call exits as soon
+        as the call returns.
+        """
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            if thread.is_alive():
+                thread.join(max(0.0, deadline - time.monotonic()))
+
+    def _run(self, name, stage, upstream, out):
+        try:
+            for item in stage(upstream):
+                self.counts[name] += 1
+                if not self._put(out, item):
+                    return
+            self._put(out, _DONE)
+        except BaseException as e:
+            if self._stop.is_set():
+                # Closed while running; nobody is left to report to
+                return
+            # Downstream stages re-raise the same error; report it once, where it happened
+            if not getattr(e, "_stage_reported", False):
+                logger.error(f"Stage '{name}' failed: {e}")
+                e._stage_reported = True
+            self._put(out, _Failure(e))
+
+    def _put(self, out, item):
+        # Blocks while the next stage is behind (backpressure), but gives up on close()
+        while not self._stop.is_set():
+            try:
+                out.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _drain(self, out):
+        while True:
+            try:
+                item = out.get(timeout=0.5)
+            except queue.Empty:
+                if self._stop.is_set():
+                    raise PipelineClosed()
+                continue
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
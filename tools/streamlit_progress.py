@@ -0,0 +1,42 @@
+import streamlit as st
+from tools.progress import Progress
+
+
+class StreamlitProgress(Progress):
+    """Progress bar, status line and end-of-run summary for the Streamlit pages."""
+
+    def __init__(self):
+        self.progress_bar = st.progress(0)
+        self.status_text = st.empty()
+
+    def update(self, percent, message):
+        self.progress_bar.progress(min(100, int(percent)))
+        self.status_text.text(message)
+
+    def finish(self, results):
+        self.progress_bar.progress(100)
+        self.status_text.text("✅ Analysis complete!")
+
+        # Show summary stats
+        st.info(f"""
+        **Analysis Summary:**
+        - Total issues processed: {results['total_issues']}
+        - Classification success rate: {results['classification_success_rate']:.1f}%
+        - DevRel suggestions generated: {results['devrel_success_rate']:.1f}%
+        - Web context added: {results['web_search_success_rate']:.1f}%
+        - Web searches skipped by budget policy: {results['web_enrichment']['skipped_total']}
+        """)
+
+        if results['classification_success_rate'] < 50:
+            st.warning("⚠️ Low classification success rate. Check your LLM endpoint!")
+
+        if results['devrel_success_rate'] < 30:
+            st.warning("⚠️ Low DevRel suggestion rate. LLM might not be responding properly.")
+
+        if results['llm_circuit']['trips']:
+            st.warning(f"⚠️ LLM endpoint looked down {results['llm_circuit']['trips']} time(s); "
+                       f"{results['llm_circuit']['short_circuited']} calls used fallbacks.")
+
+    def fail(self, error):
+        self.status_text.text("❌ Analysis failed!")
+        self.progress_bar.progress(0)
@@ -1,11 +1,54 @@
 import os
+import re
+import json
+import hashlib
 import requests
+from agents.llm_cache import LLMCache
+
+# Search results are cached on disk under a normalized query
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", "data/search_cache.sqlite")
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", 7 * 24 * 3600))        # seconds
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 20000))
+
+CODE_BLOCK = re.compile(r"```.*?(```|$)|`[^`\n]*`", re.DOTALL)
+URL = re.compile(r"https?://\S+|www\.\S+")
+WORD = re.compile(r"[a-z0-9][a-z0-9_.+#-]*[a-z0-9+#]|[a-z0-9]")
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "if", "of", "to", "in", "on", "at", "for", "with", "by",
+    "from", "as", "is", "are", "was", "were", "be", "been", "it", "its", "this", "that", "these",
+    "those", "i", "we", "you", "my", "our", "your", "me", "us", "when", "while", "not", "no", "can",
+    "cannot", "does", "do", "doesn", "don", "t", "s", "have", "has", "had", "will", "would",
+    "should", "could", "there", "here", "so", "than", "then", "also", "just", "get", "got",
+    "using", "use", "after", "before", "into", "out", "up", "about", "any", "some", "all", "see",
+}
+
+
+def strip_noise(query):
+    """Drop code blocks, inline code and URLs; they make poor search terms."""
+    return " ".join(URL.sub(" ", CODE_BLOCK.sub(" ", query)).split())
+
+
+def normalize_query(query):
+    """
+    Cache key text: lowercased, noise and stopwords removed, duplicate words
+    dropped and the rest sorted, so re-worded near-identical titles collide.
+    """
+    words = WORD.findall(strip_noise(query).lower())
+    return " ".join(sorted({word for word in words if word not in STOPWORDS}))
+
+
+def search_cache_key(query, depth, max_results):
+    payload = json.dumps({"query": normalize_query(query), "depth": depth, "max_results": max_results})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+search_cache = LLMCache(SEARCH_CACHE_PATH, SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_ENTRIES, table="search_cache")
 
 # 🔁 Toggle to enable/disable Tavily search
 USE_TAVILY = True
 
 if not USE_TAVILY:
-    def search_tavily_snippets(query, max_results=1):
+    def search_tavily_snippets(query, max_results=1, depth="advanced", limiter=None):
         print("[Tavily] Skipped search (USE_TAVILY=False)")
         return []
 
@@ -15,19 +58,33 @@ else:
     if not TAVILY_API_KEY:
         raise EnvironmentError("❌ TAVILY_API_KEY is missing. Set it in .env or secrets.toml.")
 
-    def search_tavily_snippets(query, max_results=1):
+    def search_tavily_snippets(query, max_results=1, depth="advanced", limiter=None):
+        """
+        limiter.acquire() is called before each request that actually hits the API;
+        whatever it raises is passed on, while request failures return [].
+        """
+        # Re-runs, duplicates and near-identical titles are answered from disk
+        key = search_cache_key(query, depth, max_results)
+        cached = search_cache.get(key)
+        if cached is not None:
+            print(f"[Tavily] Cache hit for: {query[:50]}...")
+            return json.loads(cached)
+
         url = "https://api.tavily.com/search"
         headers = {
             "Authorization": f"Bearer {TAVILY_API_KEY}",
             "Content-Type": "application/json"
         }
         payload = {
-            "query": query,
-            "search_depth": "advanced",
+            "query": strip_noise(query),
+            "search_depth": depth,
             "max_results": max_results,
             "include_answer": False
         }
 
+        # Outside the try: a limiter may refuse the search, which callers need to see
+        if limiter:
+            limiter.acquire()
         try:
             response = requests.post(url, json=payload, headers=headers, timeout=20)
             response.raise_for_status()
@@ -46,6 +103,8 @@ else:
                 })
 
             print(f"[Tavily] Found {len(cleaned)} result(s) for: {query[:50]}...")
+            # Only successful searches are cached; failures are retried next run
+            search_cache.set(key, json.dumps(cleaned))
             return cleaned
 
         except Exception as e:
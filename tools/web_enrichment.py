@@ -0,0 +1,125 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tools.tavily_search import search_tavily_snippets, search_cache_key, search_cache
+from tools.enrichment_policy import TAVILY_MAX_SECONDS
+
+# Searches running at once, and the request rate our Tavily plan allows
+TAVILY_WORKERS = int(os.getenv("TAVILY_WORKERS", 4))
+TAVILY_RPM = float(os.getenv("TAVILY_RPM", 100))
+TAVILY_BURST = int(os.getenv("TAVILY_BURST", 5))
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+                self.waited += wait
+            time.sleep(wait)
+
+
+class SearchBudgetExceeded(Exception):
+    """The run's search time budget ran out before this search reached the API."""
+
+
+class WebSearcher:
+    """
+    Runs Tavily searches on a small thread pool, off the LLM path. Requests
+    that reach the API are paced by a token bucket (cache hits are not), and a
+    query already in flight is not sent twice: later callers share its future.
+    The time budget (max_seconds, 0 = unlimited) is checked right before each
+    request goes out, since searches queue for a while after being submitted;
+    once it is spent, searches not answered from the cache raise SearchBudgetExceeded.
+    """
+
+    def __init__(self, workers=TAVILY_WORKERS, rpm=TAVILY_RPM, burst=TAVILY_BURST, max_seconds=TAVILY_MAX_SECONDS):
+        self.limiter = TokenBucket(rpm / 60, burst)
+        self.max_seconds = max_seconds
+        self._running = {}  # search id -> start time
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tavily")
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.coalesced = 0
+        self.seconds = 0.0  # time spent inside searches, summed over workers
+        self.completed = 0
+
+    def submit(self, query, max_results=1, depth="advanced"):
+        """Start a search and return a Future for its snippets."""
+        key = search_cache_key(query, depth, max_results)
+        with self._lock:
+            self.submitted += 1
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            future = self._executor.submit(self._search, query, max_results, depth)
+            self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def _search(self, query, max_results, depth):
+        started = time.monotonic()
+        with self._lock:
+            self._running[id(threading.current_thread())] = started
+        try:
+            return search_tavily_snippets(query, max_results, depth, limiter=self)
+        finally:
+            with self._lock:
+                del self._running[id(threading.current_thread())]
+                self.seconds += time.monotonic() - started
+                self.completed += 1
+
+    def spent(self):
+        """Search time so far, including the searches still running."""
+        now = time.monotonic()
+        with self._lock:
+            return self.seconds + sum(now - started for started in self._running.values())
+
+    def acquire(self):
+        """Called by search_tavily_snippets just before a request hits the API (cache hits skip it)."""
+        if self.max_seconds and self.spent() >= self.max_seconds:
+            raise SearchBudgetExceeded(f"search time budget of {self.max_seconds}s spent")
+        self.limiter.acquire()
+
+    def is_cached(self, query, depth="advanced", max_results=1):
+        """True if this search would be answered from the cache (or is already running)."""
+        key = search_cache_key(query, depth, max_results)
+        with self._lock:
+            if key in self._in_flight:
+                return True
+        return search_cache.contains(key)
+
+    def _forget(self, key):
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def stats(self):
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "coalesced": self.coalesced,
+            "rate_limit_wait_s": round(self.limiter.waited, 1),
+            "search_seconds": round(self.seconds, 1),
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)